@@ -0,0 +1,152 @@
+"""
+Auditoría de archivos CSV desde la línea de comandos, sin Streamlit
+
+Recorre directorios y archivos ZIP, asigna cada CSV a su categoría según
+nombre_archivo_patron y escribe el reporte en Excel y JSON (con el tiempo y
+la memoria por etapa de cada archivo en la sección 'rendimiento'). Termina con
+código 1 si algún archivo no se pudo auditar, fue rechazado por su nombre o
+encabezado o algún campus quedó incompleto.
+
+Uso:
+    python auditor_cli.py ENTREGAS/ entregas_arte.zip --excel reporte.xlsx --json reporte.json
+"""
+
+import argparse
+import json
+import os
+import sys
+import zipfile
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+from config import CATEGORIAS_CONFIG, CAMPUS_CODES, RUTA_CACHE_CORRECCIONES, PROCESOS_AUDITORIA, RUTA_MANIFIESTO
+from validador import detectar_categoria, HUELLA_REGLAS
+from ejecutor import auditar_categorias, nombre_archivo, es_csv, miembros_csv
+from reporte import construir_tabla_campus, categoria_completa, crear_excel_reporte, crear_reporte_json
+from manifiesto import ManifiestoAuditorias
+from rendimiento import medir_rendimiento, etapa, publicar
+
+def recolectar_archivos(rutas: List[str]) -> Tuple[Dict[str, list], List[Dict[str, str]]]:
+    """Agrupa por categoría los CSV encontrados en las rutas (archivos, directorios o ZIP).
+    
+    Devuelve los archivos por categoría, en el orden de CATEGORIAS_CONFIG, y los
+    problemas de los archivos que no se pudieron abrir o asignar a una categoría.
+    Los archivos se devuelven como rutas y los miembros de ZIP como referencias
+    (ver ejecutor.MiembroZip), que se abren solo mientras se auditan.
+    """
+    encontrados = []
+    problemas = []
+    
+    def agregar(ruta: str, explicito: bool):
+        if zipfile.is_zipfile(ruta):
+            try:
+                with zipfile.ZipFile(ruta) as zip_archivo:
+                    encontrados.extend(miembros_csv(zip_archivo, ruta_zip=ruta))
+            except (zipfile.BadZipFile, OSError) as e:
+                problemas.append({'nombre': ruta, 'problema': f"No se pudo abrir el ZIP: {e}"})
+        elif es_csv(ruta):
+            encontrados.append(ruta)
+        elif explicito:
+            problemas.append({'nombre': ruta, 'problema': "No es un archivo CSV ni ZIP"})
+    
+    for ruta in rutas:
+        if os.path.isdir(ruta):
+            for raiz, directorios, nombres in os.walk(ruta):
+                directorios.sort()
+                for nombre in sorted(nombres):
+                    agregar(os.path.join(raiz, nombre), explicito=False)
+        elif os.path.exists(ruta):
+            agregar(ruta, explicito=True)
+        else:
+            problemas.append({'nombre': ruta, 'problema': "No existe"})
+    
+    por_categoria = {categoria: [] for categoria in CATEGORIAS_CONFIG}
+    for archivo in encontrados:
+        categoria = detectar_categoria(nombre_archivo(archivo))
+        if categoria is None:
+            problemas.append({
+                'nombre': archivo if isinstance(archivo, str) else archivo.name,
+                'problema': "El nombre no corresponde a ninguna categoría"
+            })
+        else:
+            por_categoria[categoria].append(archivo)
+    
+    return {categoria: archivos for categoria, archivos in por_categoria.items() if archivos}, problemas
+
+def crear_parser() -> argparse.ArgumentParser:
+    marca = datetime.now().strftime('%Y%m%d_%H%M%S')
+    parser = argparse.ArgumentParser(
+        description="Audita archivos CSV de actividades estudiantiles sin la interfaz de Streamlit"
+    )
+    parser.add_argument('rutas', nargs='+', help="Archivos CSV, directorios o archivos ZIP a auditar")
+    parser.add_argument('--excel', default=f"Reporte_Auditoria_Completo_{marca}.xlsx",
+                        help="Ruta del reporte Excel")
+    parser.add_argument('--json', default=f"Reporte_Auditoria_Completo_{marca}.json",
+                        help="Ruta del reporte JSON")
+    parser.add_argument('--procesos', type=int, default=PROCESOS_AUDITORIA,
+                        help="Procesos de trabajo (1 = en secuencia)")
+    parser.add_argument('--cache', default=RUTA_CACHE_CORRECCIONES,
+                        help="Archivo SQLite para el cache persistente de correcciones")
+    parser.add_argument('--manifiesto', default=RUTA_MANIFIESTO,
+                        help="Archivo SQLite del manifiesto para re-auditar solo los archivos nuevos o modificados")
+    return parser
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = crear_parser().parse_args(argv)
+    
+    archivos_por_categoria, problemas_generales = recolectar_archivos(args.rutas)
+    if not archivos_por_categoria:
+        for problema in problemas_generales:
+            print(f"{problema['nombre']}: {problema['problema']}", file=sys.stderr)
+        print("No se encontraron archivos CSV para auditar", file=sys.stderr)
+        return 2
+    
+    manifiesto = ManifiestoAuditorias(args.manifiesto, HUELLA_REGLAS) if args.manifiesto else None
+    auditorias = auditar_categorias(
+        archivos_por_categoria, procesos=args.procesos, ruta_cache=args.cache, manifiesto=manifiesto
+    )
+    if manifiesto is not None:
+        manifiesto.cerrar()
+    
+    resultados = {}
+    problemas = {}
+    exito = not problemas_generales
+    with medir_rendimiento("Reporte") as medicion_reporte:
+        for categoria, auditorias_categoria in auditorias.items():
+            with etapa('combinacion'):
+                resultados[categoria], problemas[categoria] = construir_tabla_campus(auditorias_categoria)
+            tabla = resultados[categoria]
+            con_archivo = int((tabla['En Teams'] == 'SI').sum())
+            completos = int((tabla['Completo'] == 'SI').sum())
+            print(f"{categoria}: {len(auditorias_categoria)} archivos, {completos} de {con_archivo} campus completos")
+            
+            if not categoria_completa(tabla) or any(not auditoria['leido'] for auditoria in auditorias_categoria):
+                exito = False
+            for problema in problemas[categoria]:
+                print(f"  {problema['nombre']}: {problema['problema']}", file=sys.stderr)
+            # Los rechazados y los de un campus desconocido no tienen fila en la tabla
+            for auditoria in auditorias_categoria:
+                if auditoria['leido'] and (auditoria.get('rechazado') or auditoria['campus'] not in CAMPUS_CODES):
+                    exito = False
+                    print(f"  {auditoria['nombre']}: {'; '.join(auditoria['errores'])}", file=sys.stderr)
+        
+        if args.excel:
+            with etapa('excel'):
+                excel = crear_excel_reporte(resultados).getvalue()
+            with open(args.excel, 'wb') as salida:
+                salida.write(excel)
+    publicar(medicion_reporte.como_dict())
+    
+    for problema in problemas_generales:
+        print(f"{problema['nombre']}: {problema['problema']}", file=sys.stderr)
+    
+    if args.json:
+        reporte = crear_reporte_json(resultados, problemas, auditorias, [medicion_reporte.como_dict()])
+        reporte['archivos_sin_categoria'] = problemas_generales
+        with open(args.json, 'w', encoding='utf-8') as salida:
+            json.dump(reporte, salida, ensure_ascii=False, indent=2)
+    
+    return 0 if exito else 1
+
+if __name__ == "__main__":
+    sys.exit(main())
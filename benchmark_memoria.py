@@ -0,0 +1,87 @@
+"""
+Benchmark de memoria de la auditoría en memoria (validador.auditar_archivo)
+
+Genera un archivo sintético de la categoría indicada, lo audita y reporta el
+pico de memoria asignada durante la auditoría (tracemalloc), junto con el
+tamaño del DataFrame leído (solo columnas requeridas, o todas con
+--todas-las-columnas). Con --con-copia mide también el costo que tenía
+copiar y renombrar el DataFrame antes de validar.
+
+Uso:
+    python benchmark_memoria.py --filas 500000 --categoria "Atlético y Deportivo"
+"""
+
+import argparse
+import io
+import time
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+
+from config import CATEGORIAS_CONFIG
+from validador import leer_csv_con_encoding, auditar_archivo, verificar_estructura
+from corrector_local import CorrectorLocal
+
+def generar_csv(categoria: str, filas: int, semilla: int = 0) -> bytes:
+    """CSV sintético con las columnas requeridas de la categoría y algunos valores inválidos"""
+    config = CATEGORIAS_CONFIG[categoria]
+    aleatorio = np.random.default_rng(semilla)
+    datos = {}
+    for columna in config['columnas_requeridas']:
+        opciones = config['validaciones_especiales'].get(columna)
+        if columna in ('EJERCICIO_ACADEMICO', 'Ejercicio Académico'):
+            valores = np.array(['202511', '202411'])
+        elif columna in ('MATRICULA', 'MATRÍCULA', 'Matrícula'):
+            valores = np.array(['A01234567', 'A0123456', 'B01234567'])
+        elif columna == 'CLAVE' and config['claves_validas']:
+            valores = np.array(config['claves_validas'] + ['9.9'])
+        elif columna == 'Email':
+            valores = np.array(['A01234567@tec.mx', 'correo@otro.com'])
+        elif isinstance(opciones, list):
+            valores = np.array(opciones + [opcion.lower() for opcion in opciones[:3]])
+        else:
+            valores = np.array(['Ana', 'Luis', 'María José', ''])
+        datos[columna.lower()] = valores[aleatorio.integers(0, len(valores), filas)]
+    return pd.DataFrame(datos).to_csv(index=False).encode('utf-8')
+
+def medir(funcion):
+    """(resultado, pico de memoria en MB, segundos) de ejecutar funcion()"""
+    tracemalloc.start()
+    inicio = time.perf_counter()
+    resultado = funcion()
+    segundos = time.perf_counter() - inicio
+    _, pico = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return resultado, pico / 1024 / 1024, segundos
+
+def main():
+    parser = argparse.ArgumentParser(description="Mide la memoria de la auditoría de un archivo")
+    parser.add_argument('--filas', type=int, default=100000)
+    parser.add_argument('--categoria', default='Atlético y Deportivo', choices=list(CATEGORIAS_CONFIG))
+    parser.add_argument('--todas-las-columnas', action='store_true',
+                        help="Carga todas las columnas con los tipos que infiere pandas")
+    parser.add_argument('--con-copia', action='store_true',
+                        help="Mide también copiar y renombrar el DataFrame antes de validar")
+    args = parser.parse_args()
+    
+    nombre = CATEGORIAS_CONFIG[args.categoria]['nombre_archivo_patron'].replace('([A-Z]{2,3})\\.csv', 'QRO.csv')
+    archivo = io.BytesIO(generar_csv(args.categoria, args.filas))
+    df, encoding, es_utf8, _ = leer_csv_con_encoding(
+        archivo, None if args.todas_las_columnas else args.categoria
+    )
+    print(f"Filas: {len(df)}  DataFrame: {df.memory_usage(deep=True).sum() / 1024 / 1024:.1f} MB")
+    
+    corrector = CorrectorLocal()
+    auditoria, pico, segundos = medir(
+        lambda: auditar_archivo(df, nombre, args.categoria, encoding, es_utf8, corrector)
+    )
+    print(f"auditar_archivo: pico {pico:.1f} MB, {segundos:.2f} s, {auditoria[2]} registros válidos")
+    
+    if args.con_copia:
+        _, _, mapeo_columnas = verificar_estructura(list(df.columns), nombre, args.categoria)
+        _, pico_copia, _ = medir(lambda: df.copy().rename(columns=mapeo_columnas))
+        print(f"copia + rename (enfoque anterior): pico adicional {pico_copia:.1f} MB")
+
+if __name__ == "__main__":
+    main()
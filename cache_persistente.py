@@ -0,0 +1,144 @@
+"""
+Cache persistente de correcciones en SQLite, compartido entre ejecuciones y procesos
+"""
+
+import hashlib
+import json
+import sqlite3
+import time
+from typing import Any, Dict, Iterable, Optional, Tuple
+
+from config import CATEGORIAS_CONFIG
+
+def huella_opciones(opciones: Iterable[str]) -> str:
+    """Huella estable de una lista de opciones válidas (independiente del proceso)"""
+    return hashlib.sha1('\x1f'.join(opciones).encode('utf-8')).hexdigest()
+
+def huella_vocabularios(reglas_especificas: Optional[Dict[str, str]] = None) -> str:
+    """Huella de los vocabularios de config.py y de las reglas del corrector.
+    
+    Si cambia, las correcciones guardadas dejan de ser válidas.
+    """
+    vocabularios = {
+        categoria: {campo: valores for campo, valores in config['validaciones_especiales'].items()
+                    if isinstance(valores, list)}
+        for categoria, config in CATEGORIAS_CONFIG.items()
+    }
+    contenido = json.dumps([vocabularios, reglas_especificas or {}], sort_keys=True, ensure_ascii=False)
+    return hashlib.sha1(contenido.encode('utf-8')).hexdigest()
+
+class CachePersistente:
+    """Correcciones guardadas en un archivo SQLite local.
+    
+    La clave es el valor (sin espacios al inicio y al final) y la huella de la
+    lista de opciones. El archivo usa WAL para admitir lectores concurrentes,
+    las escrituras se agrupan en lotes y el número de entradas está acotado.
+    """
+    
+    def __init__(self, ruta: str, version: Optional[str] = None, tamano_maximo: int = 100000,
+                 tamano_lote: int = 200, timeout: float = 30.0):
+        self.ruta = ruta
+        self.tamano_maximo = tamano_maximo
+        self.tamano_lote = tamano_lote
+        self.aciertos = 0
+        self.fallos = 0
+        self._pendientes = {}
+        self._usados = set()
+        
+        self._conexion = sqlite3.connect(ruta, timeout=timeout, check_same_thread=False)
+        self._conexion.execute("PRAGMA journal_mode=WAL")
+        self._conexion.execute("PRAGMA synchronous=NORMAL")
+        with self._conexion:
+            self._conexion.execute(
+                "CREATE TABLE IF NOT EXISTS correcciones ("
+                " valor TEXT NOT NULL, huella TEXT NOT NULL, correccion TEXT, usado REAL NOT NULL,"
+                " PRIMARY KEY (valor, huella)) WITHOUT ROWID"
+            )
+            self._conexion.execute("CREATE INDEX IF NOT EXISTS idx_correcciones_usado ON correcciones (usado)")
+            self._conexion.execute(
+                "CREATE TABLE IF NOT EXISTS metadatos (clave TEXT PRIMARY KEY, valor TEXT)"
+            )
+        if version is not None:
+            self.validar_version(version)
+    
+    def validar_version(self, version: str):
+        """Borra las correcciones guardadas si los vocabularios cambiaron"""
+        fila = self._conexion.execute("SELECT valor FROM metadatos WHERE clave = 'version'").fetchone()
+        if fila is not None and fila[0] == version:
+            return
+        with self._conexion:
+            self._conexion.execute("DELETE FROM correcciones")
+            self._conexion.execute(
+                "INSERT OR REPLACE INTO metadatos (clave, valor) VALUES ('version', ?)", (version,)
+            )
+        self._pendientes.clear()
+        self._usados.clear()
+    
+    def buscar(self, valor: str, huella: str) -> Tuple[bool, Any]:
+        """Devuelve (encontrado, corrección); la corrección guardada puede ser None"""
+        clave = (valor, huella)
+        if clave in self._pendientes:
+            self.aciertos += 1
+            return True, self._pendientes[clave]
+        
+        fila = self._conexion.execute(
+            "SELECT correccion FROM correcciones WHERE valor = ? AND huella = ?", clave
+        ).fetchone()
+        if fila is None:
+            self.fallos += 1
+            return False, None
+        self.aciertos += 1
+        self._usados.add(clave)
+        return True, fila[0]
+    
+    def guardar(self, valor: str, huella: str, correccion: Optional[str]):
+        """Agrega la corrección al lote pendiente; el lote se escribe al llenarse"""
+        self._pendientes[(valor, huella)] = correccion
+        if len(self._pendientes) >= self.tamano_lote:
+            self.vaciar()
+    
+    def vaciar(self):
+        """Escribe el lote pendiente en una sola transacción y aplica el tamaño máximo"""
+        if not self._pendientes and not self._usados:
+            return
+        ahora = time.time()
+        with self._conexion:
+            self._conexion.executemany(
+                "INSERT OR REPLACE INTO correcciones (valor, huella, correccion, usado) VALUES (?, ?, ?, ?)",
+                [(valor, huella, correccion, ahora) for (valor, huella), correccion in self._pendientes.items()]
+            )
+            self._conexion.executemany(
+                "UPDATE correcciones SET usado = ? WHERE valor = ? AND huella = ?",
+                [(ahora, valor, huella) for valor, huella in self._usados]
+            )
+            # Se descartan las entradas usadas hace más tiempo
+            self._conexion.execute(
+                "DELETE FROM correcciones WHERE (valor, huella) IN (SELECT valor, huella FROM correcciones"
+                " ORDER BY usado DESC LIMIT -1 OFFSET ?)",
+                (self.tamano_maximo,)
+            )
+        self._pendientes.clear()
+        self._usados.clear()
+    
+    def estadisticas(self) -> Dict[str, float]:
+        """Contadores de uso y número de entradas guardadas"""
+        consultas = self.aciertos + self.fallos
+        entradas = self._conexion.execute("SELECT COUNT(*) FROM correcciones").fetchone()[0]
+        return {
+            'entradas': entradas + len(self._pendientes),
+            'tamano_maximo': self.tamano_maximo,
+            'aciertos': self.aciertos,
+            'fallos': self.fallos,
+            'tasa_aciertos': self.aciertos / consultas if consultas else 0.0,
+        }
+    
+    def cerrar(self):
+        """Escribe lo pendiente y cierra la conexión"""
+        self.vaciar()
+        self._conexion.close()
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, *exc):
+        self.cerrar()
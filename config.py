@@ -2,6 +2,8 @@
 Configuración y diccionarios de valores válidos para el auditor CSV
 """
 
+import os
+
 # Lista de campus
 CAMPUS_CODES = [
     'AGS', 'CCM', 'CDJ', 'CEM', 'CHI', 'CHS', 'CLM', 'COB', 'CSF', 'CUM',
@@ -161,6 +163,18 @@ CATEGORIAS_CONFIG = {
     }
 }
 
+# Otros encabezados aceptados para una columna requerida. Los encabezados se
+# comparan sin acentos, mayúsculas, espacios ni guiones bajos, así que no hace
+# falta listar esas variantes
+ALIAS_COLUMNAS = {
+    'NOMBRE COMPLETO  DEL GRUPO ESTUDIANTIL': ['NOMBRE DEL GRUPO ESTUDIANTIL'],
+    'SIGLAS DEL GRUPO ESTUDIANTIL': ['SIGLAS'],
+    'Email': ['Correo', 'Correo electrónico'],
+}
+
+# Columnas con pocos valores distintos; se cargan como categóricas
+COLUMNAS_CATEGORICAS = ['CLAVE', 'RAMA', 'DISCIPLINA', 'GIRO', 'PORTAFOLIO']
+
 # Columnas que NO se pueden corregir automáticamente
 COLUMNAS_NO_CORREGIBLES = [
     'NOMBRE',
@@ -170,3 +184,47 @@ COLUMNAS_NO_CORREGIBLES = [
     'EJERCICIO_ACADEMICO',
     'Ejercicio Académico'
 ]
+
+# Archivo SQLite para guardar correcciones entre ejecuciones (vacío = desactivado)
+RUTA_CACHE_CORRECCIONES = os.environ.get('AUDITOR_CACHE_CORRECCIONES', '')
+
+# Archivos más grandes que este límite (en bytes) se auditan por bloques
+LIMITE_AUDITORIA_EN_MEMORIA = 200 * 1024 * 1024
+
+# Filas por bloque en la auditoría por bloques
+TAMANO_BLOQUE_FILAS = 50000
+
+# Memoria (en bytes) disponible para todos los procesos de trabajo; por omisión,
+# la mitad de la memoria física (0 si no se puede consultar)
+try:
+    MEMORIA_FISICA = os.sysconf('SC_PAGE_SIZE') * os.sysconf('SC_PHYS_PAGES')
+except (AttributeError, ValueError, OSError):
+    MEMORIA_FISICA = 0
+MEMORIA_AUDITORIA = int(os.environ.get('AUDITOR_MEMORIA_MB', '0')) * 1024 * 1024 or MEMORIA_FISICA // 2
+
+# Memoria que puede ocupar un proceso al auditar en memoria un archivo del tamaño
+# de LIMITE_AUDITORIA_EN_MEMORIA (texto decodificado, DataFrame y reglas)
+MEMORIA_POR_PROCESO = 4 * LIMITE_AUDITORIA_EN_MEMORIA
+
+# Procesos de trabajo para auditar archivos en paralelo (1 = en secuencia); por
+# omisión, uno por CPU sin pasar de lo que cabe en MEMORIA_AUDITORIA
+PROCESOS_AUDITORIA = int(os.environ.get('AUDITOR_PROCESOS', '0')) or max(1, min(
+    os.cpu_count() or 1,
+    MEMORIA_AUDITORIA // MEMORIA_POR_PROCESO if MEMORIA_AUDITORIA else os.cpu_count() or 1
+))
+
+# Resultados por archivo guardados entre re-ejecuciones de la interfaz
+MAX_AUDITORIAS_EN_CACHE = 512
+
+# Archivo SQLite con los resultados por archivo de rondas anteriores; en cada
+# ronda solo se auditan los archivos nuevos o modificados. Por omisión es el mismo
+# archivo del cache de correcciones (vacío = desactivado)
+RUTA_MANIFIESTO = os.environ.get('AUDITOR_MANIFIESTO', RUTA_CACHE_CORRECCIONES)
+
+# Motor para interpretar los CSV: 'auto' (pyarrow si está instalado), 'pyarrow' o 'pandas'
+MOTOR_CSV = os.environ.get('AUDITOR_MOTOR_CSV', 'auto')
+
+# Medir el pico de memoria de cada etapa con tracemalloc; es exacto pero hace la
+# auditoría varias veces más lenta, así que por omisión solo se reportan el pico
+# y el cambio de la memoria residente del proceso en cada etapa
+MEDIR_MEMORIA = os.environ.get('AUDITOR_MEDIR_MEMORIA', '') == '1'
@@ -3,15 +3,222 @@ Corrector ortográfico local usando algoritmos de similitud
 """
 
 import pandas as pd
+import numpy as np
 import unicodedata
+import functools
 import re
+import itertools
+from collections import OrderedDict, Counter, defaultdict
 from difflib import SequenceMatcher
-from typing import List, Optional, Dict
-import streamlit as st
+from typing import List, Optional, Dict, Union, Tuple, Hashable, Any
+from cache_persistente import CachePersistente, huella_opciones, huella_vocabularios
+
+# Letras acentuadas, con diéresis o tilde más comunes en español a su letra
+# base; equivale a descomponer con NFD y quitar las marcas combinantes
+TABLA_DIACRITICOS = str.maketrans(
+    'áéíóúüñàèìòùâêîôûäëïöçÁÉÍÓÚÜÑÀÈÌÒÙÂÊÎÔÛÄËÏÖÇ',
+    'aeiouunaeiouaeiouaeiocAEIOUUNAEIOUAEIOUAEIOC'
+)
+
+@functools.lru_cache(maxsize=65536)
+def _normalizar_cadena(texto_str: str) -> str:
+    texto_str = texto_str.strip().translate(TABLA_DIACRITICOS)
+    if texto_str.isascii():
+        return ' '.join(texto_str.lower().split())
+    
+    # Caracteres fuera de la tabla: remover acentos con NFD
+    texto_normalizado = unicodedata.normalize('NFD', texto_str)
+    texto_sin_acentos = ''.join(char for char in texto_normalizado if unicodedata.category(char) != 'Mn')
+    # Convertir a lowercase y remover espacios extra
+    return re.sub(r'\s+', ' ', texto_sin_acentos.lower())
+
+def normalizar_texto(texto: str) -> str:
+    """Normaliza texto removiendo acentos, espacios extra y convirtiendo a lowercase"""
+    if pd.isna(texto):
+        return ""
+    
+    return _normalizar_cadena(str(texto))
+
+def normalizar_lote(valores: Union[pd.Series, List[Any]]) -> Union[pd.Series, List[str]]:
+    """Normaliza una columna o lista completa como normalizar_texto.
+    
+    Cada valor distinto se normaliza una sola vez; los nulos quedan como "".
+    Devuelve una Series con el mismo índice si recibe una Series y una lista
+    en otro caso.
+    """
+    serie = valores if isinstance(valores, pd.Series) else pd.Series(list(valores), dtype=object)
+    codigos, unicos = pd.factorize(serie)
+    # El código -1 (nulo) toma el último elemento, ""
+    normalizados = np.array([_normalizar_cadena(str(valor)) for valor in unicos] + [""], dtype=object)
+    resultado = normalizados[codigos]
+    if isinstance(valores, pd.Series):
+        return pd.Series(resultado, index=valores.index, dtype=object)
+    return resultado.tolist()
+
+class IndiceNGramas:
+    """Índice invertido de n-gramas de caracteres sobre textos normalizados.
+    
+    Para vocabularios grandes (empresas, nombres de grupos) recupera una lista
+    corta de candidatos consultando solo las listas de los n-gramas del valor,
+    sin recorrer todas las opciones.
+    """
+    
+    def __init__(self, textos: List[str], n: int = 3):
+        self.n = n
+        self.total = len(textos)
+        self.listas = defaultdict(list)
+        for posicion, texto in enumerate(textos):
+            for ngrama in set(self.ngramas(texto)):
+                self.listas[ngrama].append(posicion)
+    
+    def ngramas(self, texto: str) -> List[str]:
+        """N-gramas del texto con relleno para no perder inicios y finales de palabra"""
+        relleno = ' ' * (self.n - 1)
+        texto = f"{relleno}{texto} "
+        return [texto[i:i + self.n] for i in range(len(texto) - self.n + 1)]
+    
+    def candidatos(self, texto: str, limite: int = 25) -> List[int]:
+        """Posiciones de los textos con más n-gramas en común, en orden de posición"""
+        compartidos = Counter()
+        for ngrama in set(self.ngramas(texto)):
+            compartidos.update(self.listas.get(ngrama, ()))
+        mejores = sorted(compartidos.items(), key=lambda x: (-x[1], x[0]))[:limite]
+        return sorted(posicion for posicion, _ in mejores)
+
+class IndiceOpciones:
+    """Formas precalculadas de una lista de opciones válidas.
+    
+    Se construye una sola vez por lista (por ejemplo, por campo de
+    CATEGORIAS_CONFIG) para no normalizar las opciones en cada corrección.
+    """
+    _ids = itertools.count()
+    
+    # A partir de este número de opciones se usa un índice de n-gramas
+    MIN_OPCIONES_NGRAMAS = 200
+    
+    def __init__(self, opciones: List[str], usar_ngramas: Optional[bool] = None):
+        self.id = next(self._ids)
+        self._huella = None
+        self.originales = list(opciones)
+        self.conjunto = set(self.originales)
+        self.minusculas = [opcion.lower() for opcion in self.originales]
+        self.normalizadas = normalizar_lote(self.originales)
+        self.longitudes = [len(opcion) for opcion in self.normalizadas]
+        self.longitudes_minusculas = [len(opcion) for opcion in self.minusculas]
+        
+        # SequenceMatcher guarda el índice de caracteres de la segunda secuencia;
+        # se fija una vez por opción (al primer uso) y solo se cambia el valor comparado
+        self._comparadores_minusculas = [None] * len(self.originales)
+        self._comparadores_normalizados = [None] * len(self.originales)
+        
+        if usar_ngramas is None:
+            usar_ngramas = len(self.originales) >= self.MIN_OPCIONES_NGRAMAS
+        self.ngramas = IndiceNGramas(self.normalizadas) if usar_ngramas else None
+        
+        # Primera opción para cada forma, igual que un recorrido en orden
+        self.por_minusculas = {}
+        for opcion, minuscula in zip(self.originales, self.minusculas):
+            self.por_minusculas.setdefault(minuscula, opcion)
+        self.por_normalizada = {}
+        for opcion, normalizada in zip(self.originales, self.normalizadas):
+            self.por_normalizada.setdefault(normalizada, opcion)
+    
+    @property
+    def huella(self) -> str:
+        """Huella de las opciones, estable entre procesos (para el cache en disco)"""
+        if self._huella is None:
+            self._huella = huella_opciones(self.originales)
+        return self._huella
+    
+    def comparador_minusculas(self, posicion: int) -> SequenceMatcher:
+        if self._comparadores_minusculas[posicion] is None:
+            self._comparadores_minusculas[posicion] = SequenceMatcher(None, '', self.minusculas[posicion])
+        return self._comparadores_minusculas[posicion]
+    
+    def comparador_normalizado(self, posicion: int) -> SequenceMatcher:
+        if self._comparadores_normalizados[posicion] is None:
+            self._comparadores_normalizados[posicion] = SequenceMatcher(None, '', self.normalizadas[posicion])
+        return self._comparadores_normalizados[posicion]
+    
+    def candidatos(self, valor_normalizado: str, limite: int = 25) -> List[int]:
+        """Posiciones de las opciones a comparar con el valor.
+        
+        Sin índice de n-gramas son todas las opciones; con índice, solo las que
+        comparten más n-gramas con el valor.
+        """
+        if self.ngramas is None:
+            return list(range(len(self.originales)))
+        return self.ngramas.candidatos(valor_normalizado, limite)
+    
+    def __contains__(self, valor) -> bool:
+        return valor in self.conjunto
+    
+    def __iter__(self):
+        return iter(self.originales)
+    
+    def __len__(self) -> int:
+        return len(self.originales)
+
+class CacheLRU:
+    """Cache acotado con desalojo del elemento usado hace más tiempo (LRU).
+    
+    Lleva contadores de aciertos, fallos y desalojos para dimensionarlo.
+    """
+    
+    def __init__(self, tamano_maximo: int = 10000):
+        if tamano_maximo < 1:
+            raise ValueError("El tamaño máximo del cache debe ser al menos 1")
+        self.tamano_maximo = tamano_maximo
+        self._datos = OrderedDict()
+        self.aciertos = 0
+        self.fallos = 0
+        self.desalojos = 0
+    
+    def buscar(self, clave: Hashable) -> Tuple[bool, Any]:
+        """Devuelve (encontrado, valor); el valor guardado puede ser None"""
+        try:
+            valor = self._datos[clave]
+        except KeyError:
+            self.fallos += 1
+            return False, None
+        self._datos.move_to_end(clave)
+        self.aciertos += 1
+        return True, valor
+    
+    def guardar(self, clave: Hashable, valor: Any) -> Any:
+        """Guarda el valor y desaloja el más antiguo si se excede el tamaño"""
+        self._datos[clave] = valor
+        self._datos.move_to_end(clave)
+        if len(self._datos) > self.tamano_maximo:
+            self._datos.popitem(last=False)
+            self.desalojos += 1
+        return valor
+    
+    def limpiar(self):
+        """Vacía el cache sin reiniciar los contadores"""
+        self._datos.clear()
+    
+    def estadisticas(self) -> Dict[str, float]:
+        """Contadores de uso del cache"""
+        consultas = self.aciertos + self.fallos
+        return {
+            'tamano': len(self._datos),
+            'tamano_maximo': self.tamano_maximo,
+            'aciertos': self.aciertos,
+            'fallos': self.fallos,
+            'desalojos': self.desalojos,
+            'tasa_aciertos': self.aciertos / consultas if consultas else 0.0,
+        }
+    
+    def __len__(self) -> int:
+        return len(self._datos)
 
 class CorrectorLocal:
-    def __init__(self):
-        self.cache_correcciones = {}
+    def __init__(self, tamano_cache: int = 10000,
+                 cache_persistente: Optional[Union[str, CachePersistente]] = None):
+        self.cache_correcciones = CacheLRU(tamano_cache)
+        self._indices = {}
+        self.max_indices = 256
         
         # Reglas de corrección específicas para casos comunes
         self.reglas_especificas = {
@@ -111,18 +318,45 @@ class CorrectorLocal:
             'liderazgo academico capitulos estudiantiles': 'Liderazgo Académico / Capítulos Estudiantiles',
             'capitulos estudiantiles': 'Liderazgo Académico / Capítulos Estudiantiles',
         }
+        
+        # Cache en disco opcional (ruta a un archivo SQLite o instancia ya abierta)
+        if isinstance(cache_persistente, str):
+            cache_persistente = CachePersistente(
+                cache_persistente, version=huella_vocabularios(self.reglas_especificas)
+            )
+        self.cache_persistente = cache_persistente
     
     def normalizar_texto(self, texto: str) -> str:
         """Normaliza texto removiendo acentos, espacios extra y convirtiendo a lowercase"""
-        if pd.isna(texto):
-            return ""
+        return normalizar_texto(texto)
+    
+    def estadisticas_cache(self) -> Dict[str, float]:
+        """Aciertos, fallos y desalojos del cache de correcciones"""
+        return self.cache_correcciones.estadisticas()
+    
+    def construir_indice(self, opciones_validas: List[str], usar_ngramas: Optional[bool] = None) -> IndiceOpciones:
+        """Construye un índice reutilizable para una lista de opciones.
         
-        texto_str = str(texto).strip()
-        # Remover acentos
-        texto_normalizado = unicodedata.normalize('NFD', texto_str)
-        texto_sin_acentos = ''.join(char for char in texto_normalizado if unicodedata.category(char) != 'Mn')
-        # Convertir a lowercase y remover espacios extra
-        return re.sub(r'\s+', ' ', texto_sin_acentos.lower())
+        Con usar_ngramas=None el índice de n-gramas se activa solo para listas
+        grandes (ver IndiceOpciones.MIN_OPCIONES_NGRAMAS).
+        """
+        return IndiceOpciones(opciones_validas, usar_ngramas=usar_ngramas)
+    
+    def obtener_indice(self, opciones_validas: Union[List[str], IndiceOpciones]) -> IndiceOpciones:
+        """Devuelve el índice de una lista de opciones, construyéndolo solo la primera vez"""
+        if isinstance(opciones_validas, IndiceOpciones):
+            return opciones_validas
+        
+        guardado = self._indices.get(id(opciones_validas))
+        if guardado is not None and guardado[0] is opciones_validas and guardado[1].originales == opciones_validas:
+            return guardado[1]
+        
+        indice = self.construir_indice(opciones_validas)
+        if len(self._indices) >= self.max_indices:
+            # Listas temporales: se descartan los índices en lugar de acumularlos
+            self._indices.clear()
+        self._indices[id(opciones_validas)] = (opciones_validas, indice)
+        return indice
     
     def calcular_similitud(self, texto1: str, texto2: str) -> float:
         """Calcula la similitud entre dos textos usando SequenceMatcher"""
@@ -148,119 +382,238 @@ class CorrectorLocal:
         
         return previous_row[-1]
     
-    def encontrar_mejor_coincidencia(self, valor: str, opciones_validas: List[str], umbral_minimo: float = 0.65) -> Optional[str]:
+    def distancia_levenshtein_acotada(self, s1: str, s2: str, max_distancia: int) -> int:
+        """Distancia de Levenshtein que se detiene al superar max_distancia.
+        
+        Usa el algoritmo bit-paralelo de Myers (variante de Hyyrö): cada columna
+        de la matriz se actualiza con operaciones sobre enteros. Si la distancia
+        supera el límite devuelve max_distancia + 1.
+        """
+        if len(s1) < len(s2):
+            s1, s2 = s2, s1
+        n, m = len(s1), len(s2)
+        
+        # La diferencia de longitudes es una cota inferior de la distancia
+        if n - m > max_distancia:
+            return max_distancia + 1
+        if m == 0:
+            return n
+        
+        # Máscara de posiciones de cada carácter del patrón (la cadena corta)
+        posiciones = {}
+        for i, caracter in enumerate(s2):
+            posiciones[caracter] = posiciones.get(caracter, 0) | (1 << i)
+        
+        mascara = (1 << m) - 1
+        ultimo = 1 << (m - 1)
+        vp, vn = mascara, 0
+        distancia = m
+        
+        for j, caracter in enumerate(s1):
+            eq = posiciones.get(caracter, 0)
+            xv = eq | vn
+            xh = ((((eq & vp) + vp) & mascara) ^ vp) | eq
+            hp = (vn | ~(xh | vp)) & mascara
+            hn = vp & xh
+            if hp & ultimo:
+                distancia += 1
+            elif hn & ultimo:
+                distancia -= 1
+            # Cada carácter restante puede reducir la distancia a lo más en 1
+            if distancia - (n - j - 1) > max_distancia:
+                return max_distancia + 1
+            hp = ((hp << 1) | 1) & mascara
+            hn = (hn << 1) & mascara
+            vp = (hn | ~(xv | hp)) & mascara
+            vn = hp & xv
+        
+        return distancia if distancia <= max_distancia else max_distancia + 1
+    
+    def encontrar_mejor_coincidencia(self, valor: str, opciones_validas: Union[List[str], IndiceOpciones],
+                                     umbral_minimo: float = 0.65) -> Optional[str]:
         """Encuentra la mejor coincidencia usando múltiples algoritmos"""
         if pd.isna(valor):
             return None
-            
+        
         valor_str = str(valor).strip()
         if not valor_str:
             return None
         
+        indice = self.obtener_indice(opciones_validas)
+        
         # Cache para evitar recálculos
-        cache_key = f"{valor_str}_{hash(tuple(sorted(opciones_validas)))}"
-        if cache_key in self.cache_correcciones:
-            return self.cache_correcciones[cache_key]
+        cache_key = (valor_str, indice.id)
+        encontrado, guardado = self.cache_correcciones.buscar(cache_key)
+        if encontrado:
+            return guardado
         
         # 1. Coincidencia exacta
-        if valor_str in opciones_validas:
-            self.cache_correcciones[cache_key] = valor_str
-            return valor_str
+        if valor_str in indice.conjunto:
+            return self.cache_correcciones.guardar(cache_key, valor_str)
         
         # 2. Coincidencia case-insensitive
-        for opcion in opciones_validas:
-            if valor_str.lower() == opcion.lower():
-                self.cache_correcciones[cache_key] = opcion
-                return opcion
+        valor_minusculas = valor_str.lower()
+        if valor_minusculas in indice.por_minusculas:
+            opcion = indice.por_minusculas[valor_minusculas]
+            return self.cache_correcciones.guardar(cache_key, opcion)
         
         # 3. Reglas específicas
-        valor_normalizado = self.normalizar_texto(valor_str)
+        valor_normalizado = normalizar_texto(valor_str)
         if valor_normalizado in self.reglas_especificas:
             candidato = self.reglas_especificas[valor_normalizado]
-            if candidato in opciones_validas:
-                self.cache_correcciones[cache_key] = candidato
-                return candidato
+            if candidato in indice.conjunto:
+                return self.cache_correcciones.guardar(cache_key, candidato)
         
         # 4. Coincidencia sin acentos
-        for opcion in opciones_validas:
-            if valor_normalizado == self.normalizar_texto(opcion):
-                self.cache_correcciones[cache_key] = opcion
-                return opcion
+        if valor_normalizado in indice.por_normalizada:
+            opcion = indice.por_normalizada[valor_normalizado]
+            return self.cache_correcciones.guardar(cache_key, opcion)
+        
+        # Las etapas siguientes son las costosas: se consultan y se guardan en disco
+        if self.cache_persistente is not None:
+            encontrado, guardado = self.cache_persistente.buscar(valor_str, indice.huella)
+            if encontrado:
+                return self.cache_correcciones.guardar(cache_key, guardado)
+        
+        # Opciones a comparar (todas, o las candidatas del índice de n-gramas)
+        posiciones = indice.candidatos(valor_normalizado)
         
         # 5. Búsqueda por contención (para palabras compuestas)
-        for opcion in opciones_validas:
-            opcion_normalizada = self.normalizar_texto(opcion)
-            if len(valor_normalizado) > 3:
+        if len(valor_normalizado) > 3:
+            for i in posiciones:
+                opcion_normalizada = indice.normalizadas[i]
                 if (valor_normalizado in opcion_normalizada or 
                     opcion_normalizada in valor_normalizado):
-                    self.cache_correcciones[cache_key] = opcion
-                    return opcion
+                    return self._recordar(cache_key, indice, indice.originales[i])
         
         # 6. Similitud usando SequenceMatcher
-        mejores_coincidencias = []
-        for opcion in opciones_validas:
-            # Calcular similitud normal
-            similitud = self.calcular_similitud(valor_str, opcion)
-            
-            # Calcular similitud normalizada (sin acentos)
-            similitud_normalizada = self.calcular_similitud(valor_normalizado, self.normalizar_texto(opcion))
-            
-            # Usar la mejor similitud
-            similitud_final = max(similitud, similitud_normalizada)
-            
-            if similitud_final >= umbral_minimo:
-                mejores_coincidencias.append((opcion, similitud_final))
-        
-        if mejores_coincidencias:
-            # Ordenar por similitud y devolver la mejor
-            mejores_coincidencias.sort(key=lambda x: x[1], reverse=True)
-            mejor_opcion = mejores_coincidencias[0][0]
-            self.cache_correcciones[cache_key] = mejor_opcion
-            return mejor_opcion
+        mejor_opcion = self.mejor_por_similitud(valor_minusculas, valor_normalizado, indice, umbral_minimo,
+                                                posiciones)
+        if mejor_opcion:
+            return self._recordar(cache_key, indice, mejor_opcion)
         
         # 7. Distancia de Levenshtein para errores menores
-        mejor_opcion = self.busqueda_por_distancia_editorial(valor_str, opciones_validas)
+        mejor_opcion = self.busqueda_por_distancia_editorial(valor_normalizado, indice, ya_normalizado=True,
+                                                             posiciones=posiciones)
         if mejor_opcion:
-            self.cache_correcciones[cache_key] = mejor_opcion
-            return mejor_opcion
+            return self._recordar(cache_key, indice, mejor_opcion)
         
         # No se encontró coincidencia
-        self.cache_correcciones[cache_key] = None
-        return None
+        return self._recordar(cache_key, indice, None)
     
-    def busqueda_por_distancia_editorial(self, valor: str, opciones_validas: List[str], max_distancia: int = 3) -> Optional[str]:
-        """Búsqueda usando distancia de edición para errores menores"""
-        valor_normalizado = self.normalizar_texto(valor)
-        mejores_opciones = []
+    def _recordar(self, cache_key: Tuple[str, int], indice: IndiceOpciones, resultado: Optional[str]) -> Optional[str]:
+        """Guarda un resultado de las etapas costosas en memoria y, si hay, en disco"""
+        if self.cache_persistente is not None:
+            self.cache_persistente.guardar(cache_key[0], indice.huella, resultado)
+        return self.cache_correcciones.guardar(cache_key, resultado)
+    
+    def vaciar_cache_persistente(self):
+        """Escribe en disco las correcciones pendientes del lote"""
+        if self.cache_persistente is not None:
+            self.cache_persistente.vaciar()
+    
+    def mejor_por_similitud(self, valor_minusculas: str, valor_normalizado: str, indice: IndiceOpciones,
+                            umbral_minimo: float = 0.65, posiciones: Optional[List[int]] = None) -> Optional[str]:
+        """Opción con mayor similitud (original o sin acentos) que alcance el umbral.
+        
+        Las cotas superiores de SequenceMatcher (por longitudes y por conteo de
+        caracteres) descartan las opciones que no pueden superar al umbral ni a
+        la mejor opción encontrada antes de calcular el ratio completo. En empate
+        gana la primera opción de la lista.
+        """
+        mejor_opcion = None
+        minimo = umbral_minimo
+        longitud_minusculas = len(valor_minusculas)
+        longitud_normalizado = len(valor_normalizado)
         
-        for opcion in opciones_validas:
-            opcion_normalizada = self.normalizar_texto(opcion)
-            distancia = self.distancia_levenshtein(valor_normalizado, opcion_normalizada)
+        if posiciones is None:
+            posiciones = range(len(indice.originales))
+        
+        for i in posiciones:
+            opcion = indice.originales[i]
+            # Cota por longitudes (equivale a real_quick_ratio)
+            total_minusculas = longitud_minusculas + indice.longitudes_minusculas[i]
+            total_normalizado = longitud_normalizado + indice.longitudes[i]
+            cota_minusculas = (2.0 * min(longitud_minusculas, indice.longitudes_minusculas[i]) / total_minusculas
+                               if total_minusculas else 1.0)
+            cota_normalizado = (2.0 * min(longitud_normalizado, indice.longitudes[i]) / total_normalizado
+                                if total_normalizado else 1.0)
+            if not self._puede_superar(max(cota_minusculas, cota_normalizado), minimo, mejor_opcion):
+                continue
+            
+            similitud_final = None
+            for cota, comparador, valor in (
+                (cota_minusculas, indice.comparador_minusculas, valor_minusculas),
+                (cota_normalizado, indice.comparador_normalizado, valor_normalizado),
+            ):
+                if not self._puede_superar(cota, minimo, mejor_opcion):
+                    continue
+                comparador = comparador(i)
+                comparador.set_seq1(valor)
+                if not self._puede_superar(comparador.quick_ratio(), minimo, mejor_opcion):
+                    continue
+                similitud = comparador.ratio()
+                if similitud_final is None or similitud > similitud_final:
+                    similitud_final = similitud
             
+            if similitud_final is not None and self._puede_superar(similitud_final, minimo, mejor_opcion):
+                mejor_opcion, minimo = opcion, similitud_final
+                if minimo >= 1.0:
+                    break
+        
+        return mejor_opcion
+    
+    @staticmethod
+    def _puede_superar(similitud: float, minimo: float, mejor_opcion: Optional[str]) -> bool:
+        """La primera opción debe alcanzar el umbral; las siguientes, superar a la mejor"""
+        return similitud > minimo if mejor_opcion is not None else similitud >= minimo
+    
+    def busqueda_por_distancia_editorial(self, valor: str, opciones_validas: Union[List[str], IndiceOpciones],
+                                         max_distancia: int = 3, ya_normalizado: bool = False,
+                                         posiciones: Optional[List[int]] = None) -> Optional[str]:
+        """Búsqueda usando distancia de edición para errores menores"""
+        indice = self.obtener_indice(opciones_validas)
+        valor_normalizado = valor if ya_normalizado else normalizar_texto(valor)
+        longitud_valor = len(valor_normalizado)
+        mejor_opcion = None
+        mejor_distancia = None
+        
+        if posiciones is None:
+            posiciones = indice.candidatos(valor_normalizado)
+        
+        for i in posiciones:
+            opcion, opcion_normalizada, longitud_opcion = (
+                indice.originales[i], indice.normalizadas[i], indice.longitudes[i]
+            )
             # Ajustar umbral basado en longitud de texto
-            longitud_promedio = (len(valor_normalizado) + len(opcion_normalizada)) / 2
+            longitud_promedio = (longitud_valor + longitud_opcion) / 2
             umbral_dinamico = min(max_distancia, max(1, int(longitud_promedio * 0.3)))
             
+            # Solo interesa una opción estrictamente mejor que la actual
+            if mejor_distancia is not None:
+                umbral_dinamico = min(umbral_dinamico, mejor_distancia - 1)
+            if umbral_dinamico < 0 or abs(longitud_valor - longitud_opcion) > umbral_dinamico:
+                continue
+            
+            distancia = self.distancia_levenshtein_acotada(valor_normalizado, opcion_normalizada, umbral_dinamico)
             if distancia <= umbral_dinamico:
-                mejores_opciones.append((opcion, distancia))
-        
-        if mejores_opciones:
-            # Ordenar por menor distancia
-            mejores_opciones.sort(key=lambda x: x[1])
-            return mejores_opciones[0][0]
+                mejor_opcion, mejor_distancia = opcion, distancia
+                if distancia == 0:
+                    break
         
-        return None
+        return mejor_opcion
     
-    def corregir_batch(self, valores_dict: Dict[str, List[str]], opciones_dict: Dict[str, List[str]]) -> Dict[str, Dict[str, str]]:
+    def corregir_batch(self, valores_dict: Dict[str, List[str]],
+                       opciones_dict: Dict[str, Union[List[str], IndiceOpciones]]) -> Dict[str, Dict[str, str]]:
         """Corrige múltiples valores en batch"""
         correcciones = {}
         
         for campo, valores in valores_dict.items():
             if campo not in opciones_dict:
                 continue
-                
+            
             correcciones[campo] = {}
-            opciones_validas = opciones_dict[campo]
+            opciones_validas = self.obtener_indice(opciones_dict[campo])
             
             # Filtrar valores únicos
             valores_unicos = list(set([str(v).strip() for v in valores if pd.notna(v) and str(v).strip() != ""]))
@@ -271,10 +624,14 @@ class CorrectorLocal:
                     if correccion and correccion != valor:
                         correcciones[campo][valor] = correccion
         
+        self.vaciar_cache_persistente()
         return correcciones
     
     def test_corrector(self):
         """Prueba el corrector con algunos ejemplos"""
+        # Streamlit solo se necesita aquí; el corrector también se usa sin interfaz
+        import streamlit as st
+        
         ejemplos_arte = [
             ('musica', COMPANIAS_ARTE),
             ('danza folklorica', COMPANIAS_ARTE),
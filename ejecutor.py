@@ -0,0 +1,417 @@
+"""
+Ejecución de la auditoría de archivos en secuencia o con un grupo de procesos
+"""
+
+import hashlib
+import io
+import multiprocessing
+import os
+import threading
+import zipfile
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, List, Optional, Tuple, Union
+
+from config import LIMITE_AUDITORIA_EN_MEMORIA
+from validador import (auditar_archivo_subido, auditar_contenido, corrector_proceso, corresponde_a_categoria,
+                       prevalidar_estructura, HUELLA_REGLAS)
+from corrector_local import CorrectorLocal, CacheLRU
+from manifiesto import ManifiestoAuditorias
+from rendimiento import medir_rendimiento, publicar
+
+# Archivos leídos y enviados a los procesos por cada proceso de trabajo
+TAREAS_POR_PROCESO = 2
+
+# Bytes leídos por bloque al calcular la huella de un archivo
+TAMANO_BLOQUE_HUELLA = 1024 * 1024
+
+def nombre_archivo(archivo) -> str:
+    """Nombre del archivo sin directorios (los patrones se aplican sobre el nombre)"""
+    return os.path.basename(archivo if isinstance(archivo, str) else archivo.name)
+
+def tamano_archivo(archivo) -> Optional[int]:
+    """Tamaño en bytes de una ruta, un archivo subido o un archivo abierto en modo binario"""
+    if isinstance(archivo, str):
+        return os.path.getsize(archivo)
+    tamano = getattr(archivo, 'size', None)
+    if tamano is None and hasattr(archivo, 'seekable') and archivo.seekable():
+        posicion = archivo.tell()
+        tamano = archivo.seek(0, os.SEEK_END)
+        archivo.seek(posicion)
+    return tamano
+
+def es_csv(nombre: str) -> bool:
+    """True para nombres .csv que no son metadatos de macOS dentro de un ZIP"""
+    base = os.path.basename(nombre)
+    return base.lower().endswith('.csv') and not base.startswith('._') and not nombre.startswith('__MACOSX/')
+
+class MiembroZip:
+    """Miembro CSV de un ZIP; se descomprime al leerlo, sin extraerlo a disco.
+    
+    Si el ZIP está en disco (ruta_zip), no se mantiene abierto: se abre en cada
+    lectura, así que el miembro puede enviarse a un proceso de trabajo.
+    """
+    
+    def __init__(self, zip_archivo: Optional[zipfile.ZipFile], info: zipfile.ZipInfo,
+                 ruta_zip: Optional[str] = None):
+        self.zip_archivo = None if ruta_zip else zip_archivo
+        self.ruta_zip = ruta_zip
+        self.info = info
+        self.name = info.filename
+        self.size = info.file_size
+    
+    @contextmanager
+    def abrir(self):
+        """Lector en streaming del miembro"""
+        if self.ruta_zip is None:
+            with self.zip_archivo.open(self.info) as abierto:
+                yield abierto
+        else:
+            with zipfile.ZipFile(self.ruta_zip) as zip_archivo, zip_archivo.open(self.name) as abierto:
+                yield abierto
+    
+    def getvalue(self) -> bytes:
+        with self.abrir() as abierto:
+            return abierto.read()
+
+def miembros_csv(zip_archivo: zipfile.ZipFile, ruta_zip: Optional[str] = None) -> List[MiembroZip]:
+    """Miembros CSV de un ZIP en el orden del archivo (ruta_zip: ver MiembroZip)"""
+    return [
+        MiembroZip(zip_archivo, info, ruta_zip) for info in zip_archivo.infolist()
+        if not info.is_dir() and es_csv(info.filename)
+    ]
+
+def expandir_zips(archivos, categoria: str) -> Tuple[list, List[Dict[str, Any]]]:
+    """Reemplaza cada ZIP por sus miembros CSV que corresponden a la categoría.
+    
+    Devuelve los archivos a auditar y los resultados de los miembros descartados
+    (ZIP dañado o nombre que no corresponde a nombre_archivo_patron).
+    """
+    expandidos = []
+    descartados = []
+    for archivo in archivos:
+        if not nombre_archivo(archivo).lower().endswith('.zip'):
+            expandidos.append(archivo)
+            continue
+        try:
+            if isinstance(archivo, str):
+                with zipfile.ZipFile(archivo) as zip_archivo:
+                    miembros = miembros_csv(zip_archivo, ruta_zip=archivo)
+            else:
+                miembros = miembros_csv(zipfile.ZipFile(archivo))
+        except (zipfile.BadZipFile, OSError) as e:
+            descartados.append(resultado_con_problema(nombre_archivo(archivo), f"No es un ZIP válido: {e}"))
+            continue
+        for miembro in miembros:
+            if corresponde_a_categoria(nombre_archivo(miembro), categoria):
+                expandidos.append(miembro)
+            else:
+                descartados.append(resultado_con_problema(
+                    f"{nombre_archivo(archivo)}/{miembro.name}", f"El nombre no corresponde a {categoria}"
+                ))
+    return expandidos, descartados
+
+def leer_contenido(archivo) -> bytes:
+    """Bytes completos de un archivo subido, miembro de ZIP o archivo abierto en modo binario"""
+    if hasattr(archivo, 'getvalue'):
+        return archivo.getvalue()
+    archivo.seek(0)
+    return archivo.read()
+
+def archivo_en_disco(archivo) -> Optional[Union[str, MiembroZip]]:
+    """Ruta o miembro de un ZIP en disco que un proceso de trabajo puede abrir por su cuenta.
+    
+    None si el archivo solo existe en memoria (archivos subidos a la interfaz).
+    """
+    if isinstance(archivo, str):
+        return archivo
+    if isinstance(archivo, MiembroZip):
+        return archivo if archivo.ruta_zip else None
+    if isinstance(archivo, io.BufferedReader) and os.path.isfile(archivo.name):
+        return archivo.name
+    return None
+
+def se_audita_en_grupo(archivo) -> bool:
+    """True si el archivo puede auditarse en un proceso de trabajo sin copiar más de
+    LIMITE_AUDITORIA_EN_MEMORIA bytes; los más grandes que solo están en memoria se
+    auditan por bloques en este proceso"""
+    return archivo_en_disco(archivo) is not None or (tamano_archivo(archivo) or 0) <= LIMITE_AUDITORIA_EN_MEMORIA
+
+def resultado_con_problema(nombre_archivo: str, problema: str) -> Dict[str, Any]:
+    """Resultado de un archivo que no se pudo auditar"""
+    return {
+        'nombre': nombre_archivo,
+        'campus': None,
+        'leido': False,
+        'problemas': [problema],
+    }
+
+def resultado_con_excepcion(nombre_archivo: str, excepcion: BaseException) -> Dict[str, Any]:
+    """Resultado de un archivo cuya auditoría terminó con una excepción"""
+    resultado = resultado_con_problema(nombre_archivo, f"Error crítico: {str(excepcion)}")
+    resultado['excepcion'] = True
+    return resultado
+
+def huella_contenido(archivo) -> str:
+    """SHA-256 del contenido, leído por bloques para no duplicarlo en memoria"""
+    huella = hashlib.sha256()
+    if isinstance(archivo, (str, MiembroZip)):
+        with abrir_archivo(archivo) as abierto:
+            for bloque in iter(lambda: abierto.read(TAMANO_BLOQUE_HUELLA), b''):
+                huella.update(bloque)
+    elif hasattr(archivo, 'getbuffer'):
+        huella.update(archivo.getbuffer())
+    else:
+        posicion = archivo.tell()
+        archivo.seek(0)
+        for bloque in iter(lambda: archivo.read(TAMANO_BLOQUE_HUELLA), b''):
+            huella.update(bloque)
+        archivo.seek(posicion)
+    return huella.hexdigest()
+
+def clave_auditoria(archivo, categoria: str) -> Tuple[str, str, str, str]:
+    """Clave del resultado de un archivo: contenido, nombre, categoría y versión de las reglas.
+    
+    El nombre forma parte de la clave porque de él salen el campus y la
+    validación del nombre de archivo.
+    """
+    return (huella_contenido(archivo), nombre_archivo(archivo), categoria, HUELLA_REGLAS)
+
+class CacheAuditorias(CacheLRU):
+    """Resultados de auditoría por archivo, compartido entre ejecuciones y sesiones.
+    
+    Streamlit atiende cada sesión en su propio hilo, así que el acceso se serializa.
+    """
+    
+    def __init__(self, tamano_maximo: int = 256):
+        super().__init__(tamano_maximo)
+        self._candado = threading.Lock()
+    
+    def buscar(self, clave):
+        with self._candado:
+            return super().buscar(clave)
+    
+    def guardar(self, clave, valor):
+        with self._candado:
+            return super().guardar(clave, valor)
+
+@contextmanager
+def abrir_archivo(archivo):
+    """Lector binario del archivo; las rutas y los miembros de ZIP se abren solo mientras se usan"""
+    if isinstance(archivo, str):
+        with open(archivo, 'rb') as abierto:
+            yield abierto
+    elif isinstance(archivo, MiembroZip):
+        with archivo.abrir() as abierto:
+            yield abierto
+    else:
+        yield archivo
+
+def auditar_abierto(archivo, categoria: str, corrector: CorrectorLocal) -> Dict[str, Any]:
+    """Audita un archivo en este proceso"""
+    tamano = tamano_archivo(archivo)
+    with abrir_archivo(archivo) as abierto:
+        return auditar_archivo_subido(abierto, nombre_archivo(archivo), categoria, corrector, tamano=tamano)
+
+def auditar_en_proceso(archivo: Union[str, MiembroZip], categoria: str, ruta_cache: str = '') -> Dict[str, Any]:
+    """Punto de entrada de los procesos de trabajo para archivos en disco (ver archivo_en_disco).
+    
+    El proceso abre y lee el archivo por su cuenta, así que sus bytes no pasan por
+    el proceso principal y los grandes se auditan por bloques.
+    """
+    return auditar_abierto(archivo, categoria, corrector_proceso(ruta_cache))
+
+def contexto_procesos():
+    """Contexto para crear los procesos de trabajo sin copiar el proceso principal con fork.
+    
+    La interfaz corre con varios hilos, que fork no copia de forma segura.
+    """
+    if 'forkserver' not in multiprocessing.get_all_start_methods():
+        return multiprocessing.get_context('spawn')
+    contexto = multiprocessing.get_context('forkserver')
+    # El servidor importa el validador una vez y cada proceso parte de esa copia
+    contexto.set_forkserver_preload(['validador'])
+    return contexto
+
+def prevalidar(archivo, categoria: str) -> Optional[Dict[str, Any]]:
+    """Resultado del archivo si su nombre o encabezado ya lo invalidan (ver validador.prevalidar_estructura)"""
+    try:
+        with medir_rendimiento(nombre_archivo(archivo), categoria) as medicion:
+            with abrir_archivo(archivo) as abierto:
+                rechazo = prevalidar_estructura(abierto, nombre_archivo(archivo), categoria)
+    except Exception:
+        # La auditoría completa reporta el problema de lectura
+        return None
+    if rechazo is not None:
+        rechazo['rendimiento'] = medicion.como_dict()
+    return rechazo
+
+def sin_rendimiento(resultado: Dict[str, Any]) -> Dict[str, Any]:
+    """Resultado para guardar en el cache o el manifiesto, sin la medición de esta ejecución"""
+    return {clave: valor for clave, valor in resultado.items() if clave != 'rendimiento'}
+
+def _auditar_en_grupo(tareas: List[Tuple[str, Any]], procesos: int, ruta_cache: str) -> List[Dict[str, Any]]:
+    """Audita las tareas (categoría, archivo) en un grupo de procesos.
+    
+    Se envían primero los archivos más grandes. Los archivos en disco se envían
+    como ruta y cada proceso los lee por su cuenta; de los que solo están en
+    memoria se copian los bytes, como máximo de procesos * TAREAS_POR_PROCESO
+    archivos a la vez y solo de los que no pasan de LIMITE_AUDITORIA_EN_MEMORIA
+    (ver se_audita_en_grupo). Los resultados vuelven en el orden de las tareas.
+    """
+    resultados = [None] * len(tareas)
+    # Ordenadas de menor a mayor: pop() toma el archivo más grande que falta
+    pendientes = sorted(range(len(tareas)), key=lambda i: tamano_archivo(tareas[i][1]) or 0)
+    en_vuelo = {}
+    
+    with ProcessPoolExecutor(max_workers=max(1, min(procesos, len(tareas))), mp_context=contexto_procesos()) as grupo:
+        while pendientes or en_vuelo:
+            while pendientes and len(en_vuelo) < procesos * TAREAS_POR_PROCESO:
+                posicion = pendientes.pop()
+                categoria, archivo = tareas[posicion]
+                try:
+                    en_disco = archivo_en_disco(archivo)
+                    if en_disco is not None:
+                        futuro = grupo.submit(auditar_en_proceso, en_disco, categoria, ruta_cache)
+                    else:
+                        futuro = grupo.submit(
+                            auditar_contenido, nombre_archivo(archivo), leer_contenido(archivo), categoria, ruta_cache
+                        )
+                except Exception as e:
+                    resultados[posicion] = resultado_con_excepcion(nombre_archivo(archivo), e)
+                    continue
+                en_vuelo[futuro] = posicion
+            
+            terminados, _ = wait(en_vuelo, return_when=FIRST_COMPLETED)
+            for futuro in terminados:
+                posicion = en_vuelo.pop(futuro)
+                try:
+                    resultados[posicion] = futuro.result()
+                except Exception as e:
+                    resultados[posicion] = resultado_con_excepcion(nombre_archivo(tareas[posicion][1]), e)
+    return resultados
+
+def _auditar_tareas(tareas: List[Tuple[str, Any]], procesos: int, ruta_cache: str,
+                    corrector: Optional[CorrectorLocal], cache: Optional[CacheAuditorias],
+                    manifiesto: Optional[ManifiestoAuditorias],
+                    al_rechazar: Optional[Callable[[Dict[str, Any]], None]] = None) -> List[Dict[str, Any]]:
+    """Audita las tareas (categoría, archivo) reutilizando los resultados guardados.
+    
+    Se busca primero en el cache en memoria y luego en el manifiesto; solo los
+    archivos nuevos o modificados se auditan. Antes de leer sus filas se revisa
+    el nombre y el encabezado de cada uno: los rechazados se notifican de
+    inmediato con al_rechazar y el resto se audita en el grupo de procesos o en
+    secuencia. Los resultados vuelven en el orden de las tareas.
+    """
+    niveles = [nivel for nivel in (cache, manifiesto) if nivel is not None]
+    resultados = [None] * len(tareas)
+    claves = [None] * len(tareas)
+    faltantes = []
+    for posicion, (categoria, archivo) in enumerate(tareas):
+        if niveles:
+            claves[posicion] = clave_auditoria(archivo, categoria)
+        for numero, nivel in enumerate(niveles):
+            encontrado, resultado = nivel.buscar(claves[posicion])
+            if encontrado:
+                # Se copia a los niveles más rápidos
+                for anterior in niveles[:numero]:
+                    anterior.guardar(claves[posicion], resultado)
+                resultados[posicion] = resultado
+                break
+        else:
+            faltantes.append(posicion)
+    
+    # Los archivos con nombre o encabezado inválidos se resuelven sin leer sus filas
+    por_auditar = []
+    for posicion in faltantes:
+        categoria, archivo = tareas[posicion]
+        rechazo = prevalidar(archivo, categoria)
+        if rechazo is None:
+            por_auditar.append(posicion)
+            continue
+        resultados[posicion] = rechazo
+        publicar(rechazo.get('rendimiento'))
+        for nivel in niveles:
+            nivel.guardar(claves[posicion], sin_rendimiento(rechazo))
+        if al_rechazar is not None:
+            al_rechazar(rechazo)
+    faltantes = por_auditar
+    
+    en_grupo = []
+    if procesos > 1 and len(faltantes) > 1:
+        en_grupo = [posicion for posicion in faltantes if se_audita_en_grupo(tareas[posicion][1])]
+    auditados = {}
+    if en_grupo:
+        auditados.update(zip(en_grupo, _auditar_en_grupo([tareas[posicion] for posicion in en_grupo],
+                                                         procesos, ruta_cache)))
+    # Los demás (o todos, en secuencia) se auditan en este proceso
+    en_secuencia = [posicion for posicion in faltantes if posicion not in auditados]
+    if corrector is None and en_secuencia:
+        corrector = CorrectorLocal(cache_persistente=ruta_cache or None)
+    for posicion in en_secuencia:
+        categoria, archivo = tareas[posicion]
+        try:
+            auditados[posicion] = auditar_abierto(archivo, categoria, corrector)
+        except Exception as e:
+            auditados[posicion] = resultado_con_excepcion(nombre_archivo(archivo), e)
+    
+    for posicion in faltantes:
+        resultado = auditados[posicion]
+        resultados[posicion] = resultado
+        publicar(resultado.get('rendimiento'))
+        # Los errores inesperados pueden ser transitorios: no se guardan
+        if not resultado.get('excepcion'):
+            for nivel in niveles:
+                nivel.guardar(claves[posicion], sin_rendimiento(resultado))
+    if manifiesto is not None:
+        manifiesto.escribir()
+    return resultados
+
+def auditar_archivos(archivos, categoria: str, corrector: Optional[CorrectorLocal] = None,
+                     procesos: int = 1, ruta_cache: str = '',
+                     cache: Optional[CacheAuditorias] = None,
+                     manifiesto: Optional[ManifiestoAuditorias] = None,
+                     al_rechazar: Optional[Callable[[Dict[str, Any]], None]] = None) -> List[Dict[str, Any]]:
+    """Audita los archivos de una categoría (ver validador.auditar_archivo_subido).
+    
+    Los ZIP se reemplazan por sus miembros CSV (ver expandir_zips). Con
+    procesos > 1 cada archivo se lee y audita en un proceso de trabajo; en otro
+    caso se auditan en secuencia con el corrector dado. Los resultados conservan
+    el orden de los archivos, así que la tabla de campus queda igual en ambos
+    modos, y una excepción en un archivo se devuelve como su resultado. Con un
+    cache o un manifiesto, los archivos ya auditados con el mismo contenido no se
+    vuelven a auditar. al_rechazar recibe de inmediato el resultado de cada archivo
+    rechazado por su nombre o encabezado.
+    
+    Los archivos auditados en esta llamada llevan su medición en 'rendimiento',
+    que también se publica a los observadores de rendimiento.registrar_observador;
+    los resultados reutilizados no la llevan.
+    """
+    archivos, descartados = expandir_zips(archivos, categoria)
+    tareas = [(categoria, archivo) for archivo in archivos]
+    return _auditar_tareas(tareas, procesos, ruta_cache, corrector, cache, manifiesto, al_rechazar) + descartados
+
+def auditar_categorias(archivos_por_categoria: Dict[str, list], procesos: int = 1,
+                       ruta_cache: str = '', cache: Optional[CacheAuditorias] = None,
+                       manifiesto: Optional[ManifiestoAuditorias] = None,
+                       al_rechazar: Optional[Callable[[Dict[str, Any]], None]] = None) -> Dict[str, List[Dict[str, Any]]]:
+    """Audita los archivos de varias categorías con un solo grupo de procesos.
+    
+    Los archivos de todas las categorías se reparten juntos, del más grande al
+    más pequeño, para que ningún proceso quede con los archivos grandes al final
+    mientras los demás esperan. Devuelve los resultados por categoría en el orden
+    de los archivos, igual que auditar_archivos.
+    """
+    tareas = []
+    descartados = {}
+    for categoria, archivos in archivos_por_categoria.items():
+        archivos, descartados[categoria] = expandir_zips(archivos, categoria)
+        tareas.extend((categoria, archivo) for archivo in archivos)
+    
+    resultados = {categoria: [] for categoria in archivos_por_categoria}
+    auditados = _auditar_tareas(tareas, procesos, ruta_cache, None, cache, manifiesto, al_rechazar)
+    for (categoria, _), resultado in zip(tareas, auditados):
+        resultados[categoria].append(resultado)
+    for categoria, resultados_descartados in descartados.items():
+        resultados[categoria].extend(resultados_descartados)
+    return resultados
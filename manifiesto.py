@@ -0,0 +1,147 @@
+"""
+Manifiesto persistente de archivos auditados para re-auditar solo lo que cambió
+"""
+
+import json
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, Hashable, Tuple
+
+class ManifiestoAuditorias:
+    """Resultados de auditoría por archivo guardados en un archivo SQLite.
+    
+    Cada entrada se identifica por la huella del contenido, el nombre y la
+    categoría (ver ejecutor.clave_auditoria) y guarda el resultado completo:
+    errores, totales, registros válidos y correcciones. Cada archivo es una fila,
+    así que escribir() solo inserta los resultados nuevos y actualiza el uso de
+    los consultados, sin reescribir el resto. Las tablas no chocan con las de
+    cache_persistente.CachePersistente, por lo que ambos pueden compartir archivo.
+    Si la versión de las reglas cambia, las entradas se descartan. Se conservan
+    como máximo tamano_maximo entradas, desalojando las usadas hace más tiempo.
+    """
+    
+    def __init__(self, ruta: str, version: str, tamano_maximo: int = 5000, timeout: float = 30.0):
+        self.ruta = ruta
+        self.version = version
+        self.tamano_maximo = tamano_maximo
+        self.aciertos = 0
+        self.fallos = 0
+        self._pendientes = {}
+        self._usados = set()
+        self._candado = threading.Lock()
+        
+        self._conexion = sqlite3.connect(ruta, timeout=timeout, check_same_thread=False)
+        self._conexion.execute("PRAGMA journal_mode=WAL")
+        self._conexion.execute("PRAGMA synchronous=NORMAL")
+        with self._conexion:
+            self._conexion.execute(
+                "CREATE TABLE IF NOT EXISTS auditorias ("
+                " clave TEXT PRIMARY KEY, nombre TEXT NOT NULL, categoria TEXT NOT NULL,"
+                " huella TEXT NOT NULL, usado REAL NOT NULL, resultado TEXT NOT NULL) WITHOUT ROWID"
+            )
+            self._conexion.execute("CREATE INDEX IF NOT EXISTS idx_auditorias_usado ON auditorias (usado)")
+            self._conexion.execute(
+                "CREATE TABLE IF NOT EXISTS metadatos (clave TEXT PRIMARY KEY, valor TEXT)"
+            )
+        self.validar_version(version)
+    
+    @staticmethod
+    def _texto_clave(clave: Tuple[str, ...]) -> str:
+        # La versión de las reglas va en los metadatos, no en cada entrada
+        huella, nombre, categoria = clave[:3]
+        return f"{categoria}|{nombre}|{huella}"
+    
+    def validar_version(self, version: str):
+        """Borra los resultados guardados si la versión de las reglas cambió"""
+        with self._candado:
+            fila = self._conexion.execute(
+                "SELECT valor FROM metadatos WHERE clave = 'version_auditorias'"
+            ).fetchone()
+            if fila is not None and fila[0] == version:
+                return
+            with self._conexion:
+                self._conexion.execute("DELETE FROM auditorias")
+                self._conexion.execute(
+                    "INSERT OR REPLACE INTO metadatos (clave, valor) VALUES ('version_auditorias', ?)", (version,)
+                )
+            self._pendientes.clear()
+            self._usados.clear()
+    
+    def buscar(self, clave: Hashable) -> Tuple[bool, Any]:
+        """Devuelve (encontrado, resultado) para la clave de un archivo"""
+        texto = self._texto_clave(clave)
+        with self._candado:
+            if texto in self._pendientes:
+                self.aciertos += 1
+                return True, self._pendientes[texto][3]
+            
+            fila = self._conexion.execute(
+                "SELECT resultado FROM auditorias WHERE clave = ?", (texto,)
+            ).fetchone()
+            if fila is None:
+                self.fallos += 1
+                return False, None
+            # El uso se anota en memoria y se escribe con el próximo escribir()
+            self._usados.add(texto)
+            self.aciertos += 1
+            return True, json.loads(fila[0])
+    
+    def guardar(self, clave: Hashable, resultado: Dict[str, Any]) -> Dict[str, Any]:
+        """Registra el resultado de un archivo; se escribe a disco con escribir()"""
+        with self._candado:
+            self._pendientes[self._texto_clave(clave)] = (clave[1], clave[2], clave[0], resultado)
+        return resultado
+    
+    def escribir(self):
+        """Escribe los resultados nuevos y el uso de los consultados en una sola transacción"""
+        with self._candado:
+            if not self._pendientes and not self._usados:
+                return
+            ahora = time.time()
+            with self._conexion:
+                self._conexion.executemany(
+                    "INSERT OR REPLACE INTO auditorias (clave, nombre, categoria, huella, usado, resultado)"
+                    " VALUES (?, ?, ?, ?, ?, ?)",
+                    [(texto, nombre, categoria, huella, ahora, json.dumps(resultado, ensure_ascii=False))
+                     for texto, (nombre, categoria, huella, resultado) in self._pendientes.items()]
+                )
+                self._conexion.executemany(
+                    "UPDATE auditorias SET usado = ? WHERE clave = ?",
+                    [(ahora, texto) for texto in self._usados]
+                )
+                # Se descartan las entradas usadas hace más tiempo
+                self._conexion.execute(
+                    "DELETE FROM auditorias WHERE clave IN (SELECT clave FROM auditorias"
+                    " ORDER BY usado DESC LIMIT -1 OFFSET ?)",
+                    (self.tamano_maximo,)
+                )
+            self._pendientes.clear()
+            self._usados.clear()
+    
+    def estadisticas(self) -> Dict[str, float]:
+        """Contadores de uso y número de archivos registrados"""
+        consultas = self.aciertos + self.fallos
+        return {
+            'entradas': len(self),
+            'tamano_maximo': self.tamano_maximo,
+            'aciertos': self.aciertos,
+            'fallos': self.fallos,
+            'tasa_aciertos': self.aciertos / consultas if consultas else 0.0,
+        }
+    
+    def cerrar(self):
+        """Escribe lo pendiente y cierra la conexión"""
+        self.escribir()
+        self._conexion.close()
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, *exc):
+        self.cerrar()
+    
+    def __len__(self) -> int:
+        with self._candado:
+            guardadas = self._conexion.execute("SELECT COUNT(*) FROM auditorias").fetchone()[0]
+            return guardadas + len(self._pendientes)
@@ -0,0 +1,247 @@
+"""
+Tiempo y memoria por etapa de la auditoría, por archivo y por reporte
+
+Cada archivo auditado se mide con medir_rendimiento; dentro de la medición
+activa, las funciones del validador marcan sus etapas con etapa(nombre), que
+no hace nada si no hay medición. La medición de cada archivo viaja en su
+resultado ('rendimiento', ver como_dict), así que también llega desde los
+procesos de trabajo. Los colectores externos se registran con
+registrar_observador y reciben cada medición publicada.
+"""
+
+import os
+import threading
+import time
+import tracemalloc
+import warnings
+from contextlib import contextmanager, nullcontext
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+from config import MEDIR_MEMORIA
+
+# Etapas en el orden en que ocurren
+ETAPAS = {
+    'encoding': 'Detección de encoding',
+    'lectura': 'Lectura',
+    'encabezados': 'Encabezados',
+    'validacion': 'Validación',
+    'correccion': 'Corrección',
+    'combinacion': 'Combinación de resultados',
+    'excel': 'Generación de Excel',
+}
+
+def memoria_proceso_mb() -> Optional[float]:
+    """Memoria residente actual del proceso en MB, o None si no se puede medir (solo Linux)"""
+    try:
+        with open('/proc/self/statm') as statm:
+            paginas = int(statm.read().split()[1])
+    except (OSError, ValueError, IndexError):
+        return None
+    return paginas * os.sysconf('SC_PAGE_SIZE') / 1024 / 1024
+
+def pico_memoria_proceso_mb() -> Optional[float]:
+    """Pico de memoria residente del proceso (VmHWM) desde el último reinicio, en MB, o None si no se puede medir"""
+    try:
+        with open('/proc/self/status') as estado:
+            for linea in estado:
+                if linea.startswith('VmHWM:'):
+                    return int(linea.split()[1]) / 1024
+    except (OSError, ValueError, IndexError):
+        pass
+    return None
+
+def reiniciar_pico_memoria() -> bool:
+    """Lleva el pico de memoria residente del proceso a la memoria actual; False si no se puede (solo Linux)"""
+    try:
+        with open('/proc/self/clear_refs', 'w') as clear_refs:
+            clear_refs.write('5')
+    except OSError:
+        return False
+    return True
+
+# tracemalloc es de todo el proceso: las mediciones simultáneas (una por sesión
+# de la interfaz) comparten un contador para que la última en terminar lo detenga
+_TRAZADO = {'candado': threading.Lock(), 'mediciones': 0, 'propio': False}
+
+def _iniciar_trazado():
+    with _TRAZADO['candado']:
+        if _TRAZADO['mediciones'] == 0 and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            _TRAZADO['propio'] = True
+        _TRAZADO['mediciones'] += 1
+
+def _detener_trazado():
+    with _TRAZADO['candado']:
+        _TRAZADO['mediciones'] -= 1
+        if _TRAZADO['mediciones'] == 0 and _TRAZADO['propio']:
+            tracemalloc.stop()
+            _TRAZADO['propio'] = False
+
+class MedicionRendimiento:
+    """Tiempo y memoria por etapa de un archivo o de un reporte.
+    
+    El tiempo de cada etapa excluye el de las etapas anidadas en ella (la
+    corrección ocurre dentro de la validación); una etapa que se repite (por
+    ejemplo, la lectura de cada bloque) acumula su tiempo. Siempre se registran
+    el pico de memoria residente del proceso durante la etapa (el mayor entre
+    repeticiones) y cuánto cambió la memoria residente (sumado entre
+    repeticiones), incluidas las anidadas. Con medir_memoria el pico de cada
+    etapa se mide además con tracemalloc, sobre la memoria al iniciarla e
+    incluyendo a las anidadas. Ambos picos son de todo el proceso, así que con
+    varias mediciones simultáneas en hilos distintos cada una incluye la
+    memoria de las demás.
+    """
+    
+    def __init__(self, nombre: str, categoria: Optional[str] = None, medir_memoria: bool = MEDIR_MEMORIA):
+        self.nombre = nombre
+        self.categoria = categoria
+        self.medir_memoria = medir_memoria
+        self.etapas = {}
+        self.segundos = 0.0
+        self._pila = []
+    
+    @contextmanager
+    def etapa(self, nombre: str):
+        """Mide el bloque como la etapa nombre"""
+        if self.medir_memoria:
+            actual, pico = tracemalloc.get_traced_memory()
+            if self._pila:
+                self._pila[-1]['pico'] = max(self._pila[-1]['pico'], pico)
+            tracemalloc.reset_peak()
+        else:
+            actual = 0
+        # El pico residente se reinicia al empezar cada etapa, como el de tracemalloc
+        rss = memoria_proceso_mb()
+        if self._pila and self._pila[-1]['pico_rss'] is not None:
+            self._pila[-1]['pico_rss'] = max(self._pila[-1]['pico_rss'], pico_memoria_proceso_mb() or 0.0)
+        pico_rss = rss if rss is not None and reiniciar_pico_memoria() else None
+        marco = {'hijos': 0.0, 'base': actual, 'pico': actual, 'rss': rss, 'pico_rss': pico_rss}
+        self._pila.append(marco)
+        inicio = time.perf_counter()
+        try:
+            yield
+        finally:
+            duracion = time.perf_counter() - inicio
+            self._pila.pop()
+            registro = self.etapas.setdefault(
+                nombre, {'segundos': 0.0, 'pico_mb': None, 'pico_rss_mb': None, 'rss_delta_mb': None, 'veces': 0}
+            )
+            registro['segundos'] += duracion - marco['hijos']
+            registro['veces'] += 1
+            rss = memoria_proceso_mb()
+            if rss is not None and marco['rss'] is not None:
+                registro['rss_delta_mb'] = (registro['rss_delta_mb'] or 0.0) + rss - marco['rss']
+            if marco['pico_rss'] is not None:
+                marco['pico_rss'] = max(marco['pico_rss'], pico_memoria_proceso_mb() or 0.0)
+                registro['pico_rss_mb'] = max(registro['pico_rss_mb'] or 0.0, marco['pico_rss'])
+                if self._pila and self._pila[-1]['pico_rss'] is not None:
+                    self._pila[-1]['pico_rss'] = max(self._pila[-1]['pico_rss'], marco['pico_rss'])
+                reiniciar_pico_memoria()
+            if self.medir_memoria:
+                marco['pico'] = max(marco['pico'], tracemalloc.get_traced_memory()[1])
+                pico_mb = (marco['pico'] - marco['base']) / 1024 / 1024
+                registro['pico_mb'] = max(registro['pico_mb'] or 0.0, pico_mb)
+                if self._pila:
+                    self._pila[-1]['pico'] = max(self._pila[-1]['pico'], marco['pico'])
+                tracemalloc.reset_peak()
+            if self._pila:
+                self._pila[-1]['hijos'] += duracion
+    
+    def como_dict(self) -> Dict[str, Any]:
+        """Medición serializable: {'nombre', 'categoria', 'segundos', 'etapas'}.
+        
+        'etapas' va en el orden de ETAPAS y cada una tiene 'segundos', 'pico_mb'
+        (None sin medir_memoria), 'pico_rss_mb' y 'rss_delta_mb' (None si no se
+        pueden medir) y 'veces'.
+        """
+        orden = {etapa: posicion for posicion, etapa in enumerate(ETAPAS)}
+        return {
+            'nombre': self.nombre,
+            'categoria': self.categoria,
+            'segundos': self.segundos,
+            'etapas': {
+                etapa: dict(self.etapas[etapa])
+                for etapa in sorted(self.etapas, key=lambda etapa: orden.get(etapa, len(orden)))
+            },
+        }
+
+# Medición activa de cada hilo (la interfaz atiende cada sesión en su hilo)
+_estado = threading.local()
+
+@contextmanager
+def medir_rendimiento(nombre: str, categoria: Optional[str] = None, medir_memoria: bool = MEDIR_MEMORIA):
+    """Activa una medición mientras dura el bloque y la entrega al terminar.
+    
+    segundos es el tiempo total del bloque, incluido el que no cae en ninguna
+    etapa. Si medir_memoria y tracemalloc no estaba activo, se activa mientras
+    haya alguna medición de memoria en curso.
+    """
+    medicion = MedicionRendimiento(nombre, categoria, medir_memoria)
+    if medir_memoria:
+        _iniciar_trazado()
+    anterior = getattr(_estado, 'medicion', None)
+    _estado.medicion = medicion
+    inicio = time.perf_counter()
+    try:
+        yield medicion
+    finally:
+        medicion.segundos = time.perf_counter() - inicio
+        _estado.medicion = anterior
+        if medir_memoria:
+            _detener_trazado()
+
+def etapa(nombre: str):
+    """Mide el bloque como una etapa de la medición activa, si la hay"""
+    medicion = getattr(_estado, 'medicion', None)
+    return medicion.etapa(nombre) if medicion is not None else nullcontext()
+
+@contextmanager
+def medir_etapa(nombre: str, nombre_etapa: str, categoria: Optional[str] = None,
+                medir_memoria: bool = MEDIR_MEMORIA):
+    """Mide el bloque como una medición propia de una sola etapa y la publica al terminar.
+    
+    Para pasos fuera de la auditoría de un archivo, como la tabla de campus o el Excel.
+    """
+    with medir_rendimiento(nombre, categoria, medir_memoria) as medicion:
+        with etapa(nombre_etapa):
+            yield medicion
+    publicar(medicion.como_dict())
+
+def medir_iteracion(iterable: Iterable, nombre: str):
+    """Recorre iterable midiendo cada paso como la etapa nombre (p. ej. la lectura de cada bloque)"""
+    iterador = iter(iterable)
+    fin = object()
+    while True:
+        with etapa(nombre):
+            elemento = next(iterador, fin)
+        if elemento is fin:
+            return
+        yield elemento
+
+# Funciones que reciben cada medición publicada (ver registrar_observador)
+_OBSERVADORES: List[Callable[[Dict[str, Any]], None]] = []
+
+def registrar_observador(observador: Callable[[Dict[str, Any]], None]) -> Callable[[Dict[str, Any]], None]:
+    """Registra un colector externo; recibe el dict de cada medición (ver MedicionRendimiento.como_dict).
+    
+    Se llama en el proceso que publica (el principal, también para los archivos
+    auditados en procesos de trabajo). Puede usarse como decorador.
+    """
+    if observador not in _OBSERVADORES:
+        _OBSERVADORES.append(observador)
+    return observador
+
+def quitar_observador(observador: Callable[[Dict[str, Any]], None]):
+    """Deja de enviar mediciones al colector"""
+    if observador in _OBSERVADORES:
+        _OBSERVADORES.remove(observador)
+
+def publicar(medicion: Optional[Dict[str, Any]]):
+    """Entrega la medición a los observadores; un observador que falla no detiene la auditoría"""
+    if medicion is None:
+        return
+    for observador in list(_OBSERVADORES):
+        try:
+            observador(medicion)
+        except Exception as e:
+            warnings.warn(f"El observador de rendimiento {observador!r} falló: {e}")
@@ -0,0 +1,146 @@
+"""
+Tablas de resultados por campus y reportes (Excel y JSON) de la auditoría
+"""
+
+import json
+import pandas as pd
+from io import BytesIO
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+from config import CAMPUS_CODES
+from rendimiento import ETAPAS
+
+def construir_tabla_campus(auditorias: List[Dict[str, Any]]) -> Tuple[pd.DataFrame, List[Dict[str, str]]]:
+    """Arma la tabla por campus de una categoría a partir de las auditorías de sus archivos.
+    
+    Devuelve la tabla y la lista de archivos con problemas ('nombre', 'problema').
+    """
+    resultados = []
+    archivos_con_problemas = []
+    
+    # Inicializar resultados para todos los campus
+    for campus in CAMPUS_CODES:
+        resultados.append({
+            'Campus': campus,
+            'En Teams': 'NO',
+            'Errores': '',
+            'Completo': 'NO',
+            'Total Registros': 0,
+            'Registros Válidos': 0
+        })
+    
+    for auditoria in auditorias:
+        for problema in auditoria['problemas']:
+            archivos_con_problemas.append({
+                'nombre': auditoria['nombre'],
+                'problema': problema
+            })
+        
+        if not auditoria['leido']:
+            continue
+        
+        errores = auditoria['errores']
+        
+        # Actualizar resultados
+        for resultado in resultados:
+            if resultado['Campus'] == auditoria['campus']:
+                resultado['En Teams'] = 'SI'
+                resultado['Total Registros'] = auditoria['total_registros']
+                resultado['Registros Válidos'] = auditoria['registros_validos']
+                
+                if errores:
+                    # Resumir errores para la tabla
+                    errores_filtrados = [e for e in errores if not e.startswith('Archivo no en UTF-8')]
+                    
+                    if errores_filtrados:
+                        resumen_errores = '; '.join(errores_filtrados[:3])
+                        if len(resumen_errores) > 200:
+                            resumen_errores = resumen_errores[:197] + "..."
+                        resultado['Errores'] = resumen_errores
+                        resultado['Completo'] = 'NO'
+                    else:
+                        # Solo advertencias de encoding
+                        resultado['Errores'] = 'Solo problemas de formato UTF-8'
+                        resultado['Completo'] = 'SI'
+                else:
+                    resultado['Errores'] = ''
+                    resultado['Completo'] = 'SI'
+                break
+    
+    return pd.DataFrame(resultados), archivos_con_problemas
+
+def categoria_completa(tabla: pd.DataFrame) -> bool:
+    """True si todos los campus con archivo quedaron completos"""
+    con_archivo = tabla[tabla['En Teams'] == 'SI']
+    return bool((con_archivo['Completo'] == 'SI').all())
+
+def mediciones_rendimiento(auditorias_por_categoria: Dict[str, List[Dict[str, Any]]]) -> List[Dict[str, Any]]:
+    """Mediciones de rendimiento de los archivos auditados en esta ejecución"""
+    return [
+        auditoria['rendimiento']
+        for auditorias in auditorias_por_categoria.values()
+        for auditoria in auditorias
+        if auditoria.get('rendimiento')
+    ]
+
+def tabla_rendimiento(mediciones: List[Dict[str, Any]]) -> pd.DataFrame:
+    """Tabla con una fila por archivo (o reporte) y etapa, de la etapa más lenta a la más rápida"""
+    filas = []
+    for medicion in mediciones:
+        for etapa, registro in medicion['etapas'].items():
+            filas.append({
+                'Archivo': medicion['nombre'],
+                'Categoría': medicion['categoria'] or '',
+                'Etapa': ETAPAS.get(etapa, etapa),
+                'Segundos': round(registro['segundos'], 3),
+                'Pico etapa (MB)': registro['pico_mb'],
+                'Pico memoria proceso (MB)': registro['pico_rss_mb'],
+                'Cambio memoria proceso (MB)': registro['rss_delta_mb'],
+                'Veces': registro['veces'],
+                'Total archivo (s)': round(medicion['segundos'], 3),
+            })
+    columnas = ['Archivo', 'Categoría', 'Etapa', 'Segundos', 'Pico etapa (MB)', 'Pico memoria proceso (MB)',
+                'Cambio memoria proceso (MB)', 'Veces', 'Total archivo (s)']
+    return pd.DataFrame(filas, columns=columnas).sort_values('Segundos', ascending=False, ignore_index=True)
+
+def crear_excel_reporte(resultados_por_categoria):
+    """Crea archivo Excel con múltiples pestañas"""
+    output = BytesIO()
+    
+    with pd.ExcelWriter(output, engine='openpyxl') as writer:
+        for categoria, df in resultados_por_categoria.items():
+            # Limpiar nombre de hoja (Excel no permite ciertos caracteres)
+            nombre_hoja = categoria.replace('/', '_').replace('\\', '_')[:31]
+            df.to_excel(writer, sheet_name=nombre_hoja, index=False)
+    
+    output.seek(0)
+    return output
+
+def crear_reporte_json(resultados_por_categoria: Dict[str, pd.DataFrame],
+                       problemas_por_categoria: Dict[str, List[Dict[str, str]]],
+                       auditorias_por_categoria: Dict[str, List[Dict[str, Any]]],
+                       rendimiento: Optional[List[Dict[str, Any]]] = None) -> Dict[str, Any]:
+    """Reporte serializable a JSON con la tabla por campus y el detalle por archivo.
+    
+    La sección 'rendimiento' lleva las mediciones de los archivos auditados en
+    esta ejecución (los reutilizados del cache no se miden) seguidas de las del
+    reporte (ver rendimiento.MedicionRendimiento.como_dict).
+    """
+    reporte = {'generado': datetime.now().isoformat(timespec='seconds'), 'categorias': {}}
+    for categoria, tabla in resultados_por_categoria.items():
+        archivos = []
+        for auditoria in auditorias_por_categoria.get(categoria, []):
+            archivos.append({
+                clave: auditoria[clave]
+                for clave in ('nombre', 'campus', 'leido', 'encoding', 'es_utf8', 'dialecto', 'total_registros',
+                              'registros_validos', 'errores', 'correcciones')
+                if clave in auditoria
+            })
+        reporte['categorias'][categoria] = {
+            'completa': categoria_completa(tabla),
+            'campus': json.loads(tabla.to_json(orient='records', force_ascii=False)),
+            'archivos_con_problemas': problemas_por_categoria.get(categoria, []),
+            'archivos': archivos,
+        }
+    reporte['rendimiento'] = mediciones_rendimiento(auditorias_por_categoria) + (rendimiento or [])
+    return reporte
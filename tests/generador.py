@@ -0,0 +1,68 @@
+"""Archivos sintéticos con los errores típicos de los formatos de cada categoría"""
+
+import random
+
+import pandas as pd
+
+from config import CATEGORIAS_CONFIG
+
+NOMBRES_ARCHIVO = {
+    'Arte y Cultura': 'Formato_Arte_MTY.csv',
+    'Atlético y Deportivo': 'Formato_AtleticoyDeportivo_QRO.csv',
+    'CVDP': 'Formato_CVDP_CEM.csv',
+    'Grupos Estudiantiles': 'Formato_Grupos Estudiantiles_GDA.csv',
+    'Mentoreo': 'Mentoreo_MTY.csv',
+}
+
+def generar_df(categoria: str, filas: int, semilla: int) -> pd.DataFrame:
+    """DataFrame con las columnas requeridas de la categoría y valores válidos, vacíos, mal escritos o inválidos"""
+    aleatorio = random.Random(semilla)
+    config = CATEGORIAS_CONFIG[categoria]
+    
+    def desordenar(opciones):
+        valor = aleatorio.choice(opciones)
+        k = aleatorio.random()
+        if k < 0.5:
+            return valor
+        if k < 0.6:
+            return valor.lower()
+        if k < 0.7:
+            return ' ' + valor.upper() + ' '
+        if k < 0.8:
+            return valor[:-1] + 'x'
+        if k < 0.85:
+            return None
+        if k < 0.9:
+            return 'zzz qqq'
+        if k < 0.95:
+            return valor.replace('ó', 'o').replace('á', 'a').replace('í', 'i')
+        return '  '
+    
+    datos = {}
+    for columna in config['columnas_requeridas']:
+        valores = []
+        for _ in range(filas):
+            if columna in ('EJERCICIO_ACADEMICO', 'Ejercicio Académico'):
+                valores.append(aleatorio.choice(['202511', '202511', ' 202511', '202411', None, 202511]))
+            elif columna in ('MATRICULA', 'MATRÍCULA', 'Matrícula'):
+                valores.append(aleatorio.choice(
+                    ['A01234567', 'a01234567', '01234567', 'A0123', 'A0123456X', None, ' A01234567 ', 12345678]
+                ))
+            elif columna == 'CLAVE':
+                claves = config['claves_validas']
+                valores.append(aleatorio.choice(claves + ['9.9', None, ' ' + (claves or ['x'])[0]]))
+            elif columna == 'Email':
+                valores.append(aleatorio.choice(['A01234567@tec.mx', 'a01234567@TEC.mx', 'x@y', None]))
+            elif isinstance(config['validaciones_especiales'].get(columna), list):
+                valores.append(desordenar(config['validaciones_especiales'][columna]))
+            else:
+                valores.append(aleatorio.choice(['Juan', 'Ana María', '', '  ', None, 'Pérez: Jr']))
+        # Variantes del nombre de la columna
+        datos[columna.lower() if aleatorio.random() < 0.3 else columna] = valores
+    return pd.DataFrame(datos)
+
+def casos(semillas: int = 12, tamanos=(3, 40, 300, 1, 0)):
+    """(categoría, semilla, DataFrame) para cada semilla y categoría"""
+    for semilla in range(semillas):
+        for categoria in CATEGORIAS_CONFIG:
+            yield categoria, semilla, generar_df(categoria, tamanos[semilla % len(tamanos)], semilla)
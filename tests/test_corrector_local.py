@@ -0,0 +1,113 @@
+import random
+
+import pandas as pd
+
+import config
+from corrector_local import CorrectorLocal, normalizar_texto
+
+VOCABULARIOS = [
+    config.TIPOS_ESPECTACULO_ARTE, config.COMPANIAS_ARTE, config.DISCIPLINAS_ATLETICO, config.RAMAS_DEPORTIVAS,
+    config.GIROS_GRUPOS, config.PORTAFOLIOS_GRUPOS,
+]
+ALFABETO = 'abcdefghijklmnopqrstuvwxyzáéíóú /-'
+
+def valores_mal_escritos(cantidad: int, semilla: int):
+    """(valor, vocabulario) con valores de los vocabularios alterados y algunos al azar"""
+    aleatorio = random.Random(semilla)
+    for _ in range(cantidad):
+        vocabulario = aleatorio.choice(VOCABULARIOS)
+        if aleatorio.random() < 0.1:
+            yield ''.join(aleatorio.choice(ALFABETO) for _ in range(aleatorio.randint(1, 15))), vocabulario
+            continue
+        caracteres = list(aleatorio.choice(vocabulario))
+        for _ in range(aleatorio.randint(0, 6)):
+            operacion, i = aleatorio.random(), aleatorio.randrange(len(caracteres) + 1)
+            if operacion < 0.3 and caracteres:
+                del caracteres[min(i, len(caracteres) - 1)]
+            elif operacion < 0.6:
+                caracteres.insert(i, aleatorio.choice(ALFABETO))
+            elif caracteres:
+                caracteres[min(i, len(caracteres) - 1)] = aleatorio.choice(ALFABETO)
+        valor = ''.join(caracteres)
+        k = aleatorio.random()
+        yield valor.upper() if k < 0.2 else valor.lower() if k < 0.4 else valor, vocabulario
+
+def distancia_editorial_original(corrector, valor, opciones, max_distancia=3):
+    """busqueda_por_distancia_editorial original: distancia completa con cada opción"""
+    valor_normalizado = normalizar_texto(valor)
+    mejores = []
+    for opcion in opciones:
+        opcion_normalizada = normalizar_texto(opcion)
+        distancia = corrector.distancia_levenshtein(valor_normalizado, opcion_normalizada)
+        longitud_promedio = (len(valor_normalizado) + len(opcion_normalizada)) / 2
+        if distancia <= min(max_distancia, max(1, int(longitud_promedio * 0.3))):
+            mejores.append((opcion, distancia))
+    mejores.sort(key=lambda x: x[1])
+    return mejores[0][0] if mejores else None
+
+def similitud_original(corrector, valor, opciones, umbral_minimo=0.65):
+    """Etapa 6 original: ratio completo con cada opción y orden por similitud"""
+    mejores = []
+    for opcion in opciones:
+        similitud = max(
+            corrector.calcular_similitud(valor, opcion),
+            corrector.calcular_similitud(normalizar_texto(valor), normalizar_texto(opcion)),
+        )
+        if similitud >= umbral_minimo:
+            mejores.append((opcion, similitud))
+    mejores.sort(key=lambda x: x[1], reverse=True)
+    return mejores[0][0] if mejores else None
+
+def coincidencia_original(corrector, valor, opciones):
+    """encontrar_mejor_coincidencia original, sin cache ni índices"""
+    if pd.isna(valor) or not str(valor).strip():
+        return None
+    valor = str(valor).strip()
+    if valor in opciones:
+        return valor
+    for opcion in opciones:
+        if valor.lower() == opcion.lower():
+            return opcion
+    valor_normalizado = normalizar_texto(valor)
+    candidato = corrector.reglas_especificas.get(valor_normalizado)
+    if candidato in opciones:
+        return candidato
+    for opcion in opciones:
+        if valor_normalizado == normalizar_texto(opcion):
+            return opcion
+    if len(valor_normalizado) > 3:
+        for opcion in opciones:
+            opcion_normalizada = normalizar_texto(opcion)
+            if valor_normalizado in opcion_normalizada or opcion_normalizada in valor_normalizado:
+                return opcion
+    return similitud_original(corrector, valor, opciones) or distancia_editorial_original(corrector, valor, opciones)
+
+def test_levenshtein_acotada_igual_a_la_completa():
+    corrector = CorrectorLocal()
+    aleatorio = random.Random(3)
+    for _ in range(3000):
+        a = ''.join(aleatorio.choice('abcd ') for _ in range(aleatorio.randint(0, 12)))
+        b = ''.join(aleatorio.choice('abcd ') for _ in range(aleatorio.randint(0, 12)))
+        limite = aleatorio.randint(0, 5)
+        completa = corrector.distancia_levenshtein(a, b)
+        assert corrector.distancia_levenshtein_acotada(a, b, limite) == min(completa, limite + 1), (a, b, limite)
+
+def test_distancia_editorial_igual_que_la_original():
+    corrector = CorrectorLocal()
+    for valor, vocabulario in valores_mal_escritos(1000, 7):
+        todas = range(len(vocabulario))
+        esperado = distancia_editorial_original(corrector, valor, vocabulario)
+        assert corrector.busqueda_por_distancia_editorial(valor, vocabulario, posiciones=todas) == esperado, valor
+
+def test_similitud_con_cotas_igual_que_la_original():
+    corrector = CorrectorLocal()
+    for valor, vocabulario in valores_mal_escritos(1000, 11):
+        indice = corrector.obtener_indice(vocabulario)
+        obtenido = corrector.mejor_por_similitud(valor.lower(), normalizar_texto(valor), indice)
+        assert obtenido == similitud_original(corrector, valor, vocabulario), valor
+
+def test_mejor_coincidencia_igual_que_la_original():
+    corrector = CorrectorLocal()
+    for valor, vocabulario in valores_mal_escritos(1000, 5):
+        esperado = coincidencia_original(corrector, valor, vocabulario)
+        assert corrector.encontrar_mejor_coincidencia(valor, vocabulario) == esperado, valor
@@ -0,0 +1,61 @@
+import sqlite3
+
+from cache_persistente import CachePersistente
+from manifiesto import ManifiestoAuditorias
+
+def resultado(nombre: str):
+    return {'nombre': nombre, 'leido': True, 'total_registros': 3, 'registros_validos': 2,
+            'errores': ['Nombre no puede estar vacío: 1 casos'], 'correcciones': []}
+
+def test_escribir_solo_agrega_los_archivos_nuevos(tmp_path):
+    ruta = str(tmp_path / 'auditorias.sqlite')
+    with ManifiestoAuditorias(ruta, 'v1') as manifiesto:
+        manifiesto.guardar(('h1', 'A.csv', 'Arte'), resultado('A.csv'))
+        manifiesto.guardar(('h2', 'B.csv', 'Arte'), resultado('B.csv'))
+    
+    with ManifiestoAuditorias(ruta, 'v1') as manifiesto:
+        assert manifiesto.buscar(('h1', 'A.csv', 'Arte')) == (True, resultado('A.csv'))
+        assert manifiesto.buscar(('h3', 'A.csv', 'Arte')) == (False, None)
+        manifiesto.guardar(('h3', 'A.csv', 'Arte'), resultado('A.csv'))
+        sentencias = []
+        manifiesto._conexion.set_trace_callback(sentencias.append)
+        manifiesto.escribir()
+        manifiesto._conexion.set_trace_callback(None)
+        # Se inserta el archivo nuevo y se actualiza el uso del consultado; B.csv no se toca
+        insertadas = [sentencia for sentencia in sentencias if sentencia.startswith('INSERT')]
+        assert len(insertadas) == 1 and "'A.csv'" in insertadas[0] and "'h3'" in insertadas[0]
+        assert not any("B.csv" in sentencia for sentencia in sentencias)
+        assert len(manifiesto) == 3
+
+def test_otra_version_descarta_las_entradas(tmp_path):
+    ruta = str(tmp_path / 'auditorias.sqlite')
+    with ManifiestoAuditorias(ruta, 'v1') as manifiesto:
+        manifiesto.guardar(('h1', 'A.csv', 'Arte'), resultado('A.csv'))
+    with ManifiestoAuditorias(ruta, 'v2') as manifiesto:
+        assert manifiesto.buscar(('h1', 'A.csv', 'Arte')) == (False, None)
+        assert len(manifiesto) == 0
+
+def test_desaloja_las_usadas_hace_mas_tiempo(tmp_path):
+    ruta = str(tmp_path / 'auditorias.sqlite')
+    with ManifiestoAuditorias(ruta, 'v1', tamano_maximo=2) as manifiesto:
+        for numero in range(3):
+            manifiesto.guardar((f'h{numero}', f'{numero}.csv', 'Arte'), resultado(f'{numero}.csv'))
+            manifiesto.escribir()
+    with ManifiestoAuditorias(ruta, 'v1', tamano_maximo=2) as manifiesto:
+        assert len(manifiesto) == 2
+        assert manifiesto.buscar(('h0', '0.csv', 'Arte')) == (False, None)
+
+def test_comparte_archivo_con_el_cache_de_correcciones(tmp_path):
+    ruta = str(tmp_path / 'cache.sqlite')
+    with CachePersistente(ruta, version='vocabularios') as cache:
+        cache.guardar('Softbalx', 'opciones', 'Softball')
+    with ManifiestoAuditorias(ruta, 'reglas') as manifiesto:
+        manifiesto.guardar(('h1', 'A.csv', 'Arte'), resultado('A.csv'))
+    with CachePersistente(ruta, version='vocabularios') as cache:
+        assert cache.buscar('Softbalx', 'opciones') == (True, 'Softball')
+    with ManifiestoAuditorias(ruta, 'reglas') as manifiesto:
+        assert manifiesto.buscar(('h1', 'A.csv', 'Arte'))[0]
+    with sqlite3.connect(ruta) as conexion:
+        assert {'correcciones', 'auditorias', 'metadatos'} <= {
+            fila[0] for fila in conexion.execute("SELECT name FROM sqlite_master WHERE type = 'table'")
+        }
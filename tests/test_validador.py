@@ -0,0 +1,218 @@
+import io
+
+import pandas as pd
+import pytest
+
+from config import CATEGORIAS_CONFIG
+from corrector_local import CorrectorLocal
+from generador import NOMBRES_ARCHIVO, casos, generar_df
+from validador import (LIMITE_AUDITORIA_EN_MEMORIA, TAMANO_MUESTRA, auditar_archivo, auditar_archivo_subido,
+                       auditar_csv_por_bloques, columnas_encabezado, evaluar_reglas, formatear_errores, ingerir_csv,
+                       leer_csv_con_encoding, leer_encabezado, prevalidar_estructura, resumir_conteo, resumir_errores,
+                       validar_email_mentoreo, validar_matricula, validar_valor_con_correccion, verificar_estructura)
+
+CATEGORIA = 'Arte y Cultura'
+FILA_VALIDA = ['202511', 'Ana', 'Pérez', 'López', 'A01234567', '2.2', 'Concierto', 'Compañía Titular']
+
+def csv_con_columnas_extra(extra: int) -> bytes:
+    """CSV válido de Arte y Cultura con extra columnas adicionales al final"""
+    encabezado = CATEGORIAS_CONFIG[CATEGORIA]['columnas_requeridas'] + [f'COLUMNA_ADICIONAL_DEL_FORMATO_{i}' for i in range(extra)]
+    fila = FILA_VALIDA + ['x'] * extra
+    return f"{','.join(encabezado)}\n{','.join(fila)}\n{','.join(fila)}\n".encode('utf-8')
+
+def test_encabezado_mas_largo_que_la_muestra():
+    contenido = csv_con_columnas_extra(400)
+    assert contenido.index(b'\n') > TAMANO_MUESTRA
+    
+    columnas, encoding, _ = leer_encabezado(io.BytesIO(contenido))
+    assert len(columnas) == 8 + 400
+    assert encoding == 'utf-8'
+    assert prevalidar_estructura(io.BytesIO(contenido), 'Formato_Arte_MTY.csv', CATEGORIA) is None
+    
+    # Solo se cargan las columnas requeridas
+    lectura = ingerir_csv(io.BytesIO(contenido), CATEGORIA, 'pandas')
+    assert list(lectura['df'].columns) == CATEGORIAS_CONFIG[CATEGORIA]['columnas_requeridas']
+    assert len(lectura['df']) == 2
+
+def test_encabezado_tras_lineas_en_blanco():
+    assert columnas_encabezado('\n\r\nA,B\n1,2\n') == ['A', 'B']
+
+def test_comilla_sin_cerrar_en_el_encabezado():
+    texto = 'A,"B\n' + 'x' * 200000 + '\n'
+    assert columnas_encabezado(texto) == ['A', 'B\n']
+    
+    lectura = ingerir_csv(io.BytesIO(texto.encode('utf-8')), CATEGORIA, 'pandas')
+    assert lectura['df'] is None
+    assert lectura['error_parseo']
+
+def test_fila_con_campos_de_mas():
+    contenido = csv_con_columnas_extra(0) + ','.join(FILA_VALIDA + ['sobrante']).encode('utf-8') + b'\n'
+    
+    for motor in ('pandas', 'pyarrow'):
+        lectura = ingerir_csv(io.BytesIO(contenido), CATEGORIA, motor)
+        assert lectura['df'] is None
+        assert 'Expected 8 fields in line 4, saw 9' in lectura['error_parseo']
+    
+    auditoria = auditar_csv_por_bloques(
+        io.BytesIO(contenido), 'Formato_Arte_MTY.csv', CATEGORIA, CorrectorLocal(), tamano_bloque=1000
+    )
+    assert 'Expected 8 fields in line 4, saw 9' in auditoria['error_parseo']
+
+def test_error_de_interpretacion_en_un_bloque_posterior():
+    filas = [','.join(FILA_VALIDA)] * 2500
+    filas[2200] += ',sobrante'
+    contenido = csv_con_columnas_extra(0) + '\n'.join(filas).encode('utf-8') + b'\n'
+    
+    auditoria = auditar_csv_por_bloques(
+        io.BytesIO(contenido), 'Formato_Arte_MTY.csv', CATEGORIA, CorrectorLocal(), tamano_bloque=1000
+    )
+    assert 'Expected 8 fields in line 2204, saw 9' in auditoria['error_parseo']
+    assert (auditoria['total_registros'], auditoria['registros_validos'], auditoria['correcciones']) == (0, 0, [])
+    
+    # Por bloques el archivo falla igual que en memoria
+    en_memoria = auditar_archivo_subido(io.BytesIO(contenido), 'Formato_Arte_MTY.csv', CATEGORIA, CorrectorLocal())
+    por_bloques = auditar_archivo_subido(
+        io.BytesIO(contenido), 'Formato_Arte_MTY.csv', CATEGORIA, CorrectorLocal(),
+        tamano=LIMITE_AUDITORIA_EN_MEMORIA + 1
+    )
+    for resultado in (en_memoria, por_bloques):
+        resultado.pop('rendimiento')
+    assert not por_bloques['leido']
+    assert por_bloques == en_memoria
+
+def auditar_fila_por_fila(df, categoria, corrector):
+    """Recorrido fila por fila de la versión original de auditar_archivo (iterrows).
+    
+    Devuelve (registros válidos, errores por fila, correcciones de matrícula,
+    {(campo, valor, corrección): filas}).
+    """
+    config = CATEGORIAS_CONFIG[categoria]
+    _, _, mapeo = verificar_estructura(list(df.columns), NOMBRES_ARCHIVO[categoria], categoria)
+    df = df.rename(columns=mapeo)
+    validos = 0
+    errores = []
+    correcciones = []
+    correcciones_valor = {}
+    for idx, row in df.iterrows():
+        valido = True
+        
+        def fallar(mensaje):
+            nonlocal valido
+            errores.append(f"Fila {idx + 2}: {mensaje}")
+            valido = False
+        
+        ejercicio_col = 'EJERCICIO_ACADEMICO' if 'EJERCICIO_ACADEMICO' in df.columns else 'Ejercicio Académico'
+        if ejercicio_col in df.columns:
+            if pd.isna(row[ejercicio_col]) or str(row[ejercicio_col]).strip() != "202511":
+                fallar("Ejercicio académico debe ser '202511'")
+        nombre_col = 'NOMBRE' if 'NOMBRE' in df.columns else 'Nombre completo'
+        if nombre_col in df.columns:
+            if pd.isna(row[nombre_col]) or str(row[nombre_col]).strip() == "":
+                fallar("Nombre no puede estar vacío")
+        if 'APELLIDO PATERNO' in df.columns:
+            if pd.isna(row['APELLIDO PATERNO']) or str(row['APELLIDO PATERNO']).strip() == "":
+                fallar("Apellido paterno no puede estar vacío")
+        matricula_col = ('MATRICULA' if 'MATRICULA' in df.columns
+                         else 'MATRÍCULA' if 'MATRÍCULA' in df.columns else 'Matrícula')
+        if matricula_col in df.columns:
+            valida, mensaje, corregida = validar_matricula(row[matricula_col])
+            if not valida:
+                fallar(mensaje)
+            elif corregida != str(row[matricula_col]).strip():
+                correcciones.append(f"Matrícula corregida en fila {idx + 2}: {row[matricula_col]} → {corregida}")
+        if 'CLAVE' in df.columns and config['claves_validas']:
+            if pd.isna(row['CLAVE']) or str(row['CLAVE']).strip() not in config['claves_validas']:
+                fallar(f"Clave '{row['CLAVE']}' no válida")
+        for campo, valores_permitidos in config['validaciones_especiales'].items():
+            if campo not in df.columns:
+                continue
+            if campo == 'Email' and categoria == 'Mentoreo':
+                valida, mensaje = validar_email_mentoreo(row[campo], row[matricula_col])
+                if not valida:
+                    fallar(mensaje)
+            elif valores_permitidos is None:
+                if pd.isna(row[campo]) or str(row[campo]).strip() == "":
+                    fallar(f"{campo} no puede estar vacío")
+            else:
+                valida, mensaje, corregido = validar_valor_con_correccion(
+                    row[campo], valores_permitidos, campo, corrector
+                )
+                if not valida:
+                    fallar(mensaje)
+                elif corregido and corregido != str(row[campo]).strip():
+                    clave = (campo, str(row[campo]).strip(), corregido)
+                    correcciones_valor[clave] = correcciones_valor.get(clave, 0) + 1
+        if valido:
+            validos += 1
+    return validos, errores, correcciones, correcciones_valor
+
+def como_csv(df):
+    """El DataFrame tal como se lee de un CSV: todo texto y los vacíos como nulos"""
+    return pd.read_csv(io.StringIO(df.to_csv(index=False)), dtype=str, keep_default_na=False, na_values=[''])
+
+@pytest.mark.parametrize('leido', [False, True], ids=['objetos', 'csv'])
+def test_reglas_por_columna_igual_que_fila_por_fila(leido):
+    corrector = CorrectorLocal()
+    for categoria, semilla, df in casos():
+        if leido:
+            df = como_csv(df)
+        validos, errores, correcciones, correcciones_valor = auditar_fila_por_fila(df, categoria, corrector)
+        
+        _, faltantes, mapeo = verificar_estructura(list(df.columns), NOMBRES_ARCHIVO[categoria], categoria)
+        assert not faltantes
+        validez, registro, correcciones_fila, valores = evaluar_reglas(df, categoria, corrector, mapeo)
+        caso = (categoria, semilla)
+        assert int(validez.sum()) == validos, caso
+        assert formatear_errores(registro) == errores, caso
+        assert correcciones_fila == correcciones, caso
+        assert {(campo, valor, corregido): filas for campo, valor, corregido, filas in valores} == correcciones_valor, caso
+
+def test_por_bloques_igual_que_en_memoria():
+    corrector = CorrectorLocal()
+    for categoria, semilla, df in casos(semillas=6):
+        contenido = df.to_csv(index=False).encode('utf-8')
+        nombre = NOMBRES_ARCHIVO[categoria]
+        lectura = ingerir_csv(io.BytesIO(contenido), categoria, 'pandas')
+        errores, total, validos, correcciones, registro = auditar_archivo(
+            lectura['df'], nombre, categoria, lectura['encoding'], lectura['es_utf8'], corrector
+        )
+        bloques = auditar_csv_por_bloques(io.BytesIO(contenido), nombre, categoria, corrector, tamano_bloque=23)
+        caso = (categoria, semilla)
+        assert bloques['errores'] == errores, caso
+        assert bloques['total_registros'] == total, caso
+        assert bloques['registros_validos'] == validos, caso
+        assert bloques['correcciones'] == correcciones, caso
+        assert resumir_conteo(bloques['conteo_errores']) == resumir_errores(registro), caso
+        assert formatear_errores(bloques['registro_errores']) == formatear_errores(registro), caso
+
+def variantes_csv():
+    """Contenidos con BOM, cp1252, líneas en blanco, saltos de línea entre comillas, textos NA y columnas extra"""
+    for categoria, semilla, df in casos(semillas=8):
+        df = df.assign(EXTRA='x')
+        texto = df.to_csv(index=False)
+        if semilla % 4 == 1:
+            texto = texto.replace('Juan', '"Ju\nan"').replace('Ana', 'NA')
+        elif semilla % 4 == 2:
+            texto = '\ufeff' + texto
+        elif semilla % 4 == 3:
+            texto = '\n' + texto + '\n\n'
+        contenido = texto.encode('cp1252', errors='replace') if semilla % 5 == 4 else texto.encode('utf-8')
+        yield categoria, semilla, contenido
+    yield 'Arte y Cultura', -1, b'EJERCICIO_ACADEMICO,NOMBRE\n1,2,3\n'
+    yield 'Arte y Cultura', -2, generar_df('Arte y Cultura', 5, 1).to_csv(index=False).encode('utf-8') + b'1,2\n'
+
+def test_pyarrow_igual_que_pandas():
+    pytest.importorskip('pyarrow')
+    corrector = CorrectorLocal()
+    
+    def auditar(contenido, categoria, motor):
+        df, encoding, es_utf8, error = leer_csv_con_encoding(io.BytesIO(contenido), categoria, motor)
+        if df is None:
+            return error
+        errores, total, validos, correcciones, registro = auditar_archivo(
+            df, NOMBRES_ARCHIVO[categoria], categoria, encoding, es_utf8, corrector
+        )
+        return errores, total, validos, correcciones, formatear_errores(registro)
+    
+    for categoria, semilla, contenido in variantes_csv():
+        assert auditar(contenido, categoria, 'pyarrow') == auditar(contenido, categoria, 'pandas'), (categoria, semilla)
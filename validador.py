@@ -3,56 +3,373 @@ Funciones de validación para el auditor CSV
 """
 
 import pandas as pd
+import numpy as np
 import re
+import io
+import codecs
+import csv
+import itertools
+import functools
+import hashlib
+import json
 import chardet
-from typing import Tuple, Optional, List, Dict
-from config import CATEGORIAS_CONFIG, COLUMNAS_NO_CORREGIBLES, CAMPUS_CODES
-from corrector_local import CorrectorLocal
+try:
+    import pyarrow as pa
+    import pyarrow.csv as pa_csv
+except ImportError:
+    pa = pa_csv = None
+from typing import Tuple, Optional, List, Dict, Union, Any
+from config import (CATEGORIAS_CONFIG, COLUMNAS_NO_CORREGIBLES, CAMPUS_CODES, ALIAS_COLUMNAS, COLUMNAS_CATEGORICAS,
+                    LIMITE_AUDITORIA_EN_MEMORIA, TAMANO_BLOQUE_FILAS, MOTOR_CSV)
+from corrector_local import CorrectorLocal, IndiceOpciones, normalizar_texto
+from cache_persistente import huella_vocabularios
+from rendimiento import etapa, medir_iteracion, medir_rendimiento
+
+# Mensaje por código de error de registro; {columna}, {valor} y {detalle} se
+# completan con los datos de la fila que falla
+MENSAJES_ERROR = {
+    'ejercicio_invalido': "Ejercicio académico debe ser '202511'",
+    'nombre_vacio': "Nombre no puede estar vacío",
+    'apellido_vacio': "Apellido paterno no puede estar vacío",
+    'matricula_vacia': "Matrícula vacía",
+    'matricula_longitud': "Matrícula debe tener 9 caracteres, tiene {detalle}",
+    'matricula_formato': "Matrícula debe ser A seguida de 8 dígitos",
+    'clave_invalida': "Clave '{valor}' no válida",
+    'email_vacio': "Email o matrícula vacíos",
+    'email_invalido': "Email debe ser {detalle}",
+    'campo_vacio': "{columna} no puede estar vacío",
+    'valor_invalido': "{columna} '{valor}' no es válido. Opciones: {detalle}",
+}
+
+# Descripción de cada tipo de error en los resúmenes (sin datos de la fila)
+TIPOS_ERROR = {
+    'ejercicio_invalido': "Ejercicio académico debe ser '202511'",
+    'nombre_vacio': "Nombre no puede estar vacío",
+    'apellido_vacio': "Apellido paterno no puede estar vacío",
+    'matricula_vacia': "Matrícula vacía",
+    'matricula_longitud': "Matrícula debe tener 9 caracteres",
+    'matricula_formato': "Matrícula debe ser A seguida de 8 dígitos",
+    'clave_invalida': "Clave no válida",
+    'email_vacio': "Email o matrícula vacíos",
+    'email_invalido': "Email debe ser matrícula@tec.mx",
+    'campo_vacio': "{columna} no puede estar vacío",
+    'valor_invalido': "{columna} no es válido",
+}
+
+# Aumentar cuando cambie la lógica de validación para invalidar los resultados guardados
+VERSION_AUDITORIA = 3
+
+def huella_reglas() -> str:
+    """Huella de todo lo que determina el resultado de auditar un archivo"""
+    contenido = json.dumps([
+        VERSION_AUDITORIA, CATEGORIAS_CONFIG, COLUMNAS_NO_CORREGIBLES, CAMPUS_CODES, ALIAS_COLUMNAS,
+        MENSAJES_ERROR, TIPOS_ERROR, LIMITE_AUDITORIA_EN_MEMORIA, TAMANO_BLOQUE_FILAS,
+        huella_vocabularios(CorrectorLocal().reglas_especificas),
+    ], sort_keys=True, ensure_ascii=False)
+    return hashlib.sha1(contenido.encode('utf-8')).hexdigest()
+
+HUELLA_REGLAS = huella_reglas()
+
+# Bytes usados para detectar el encoding cuando el archivo no es UTF-8
+TAMANO_MUESTRA = 10000
+
+def detectar_encoding_muestra(muestra: bytes) -> Tuple[Optional[str], float]:
+    """Detecta el encoding de una muestra de bytes"""
+    try:
+        resultado = chardet.detect(muestra)
+        return resultado['encoding'], resultado['confidence'] or 0
+    except Exception:
+        return None, 0
 
 def detectar_encoding(archivo) -> Tuple[Optional[str], float]:
     """Detecta el encoding del archivo"""
     try:
         archivo.seek(0)
-        muestra = archivo.read(10000)
+        muestra = archivo.read(TAMANO_MUESTRA)
         archivo.seek(0)
         
-        resultado = chardet.detect(muestra)
-        encoding_detectado = resultado['encoding']
-        confianza = resultado['confidence']
-        
-        return encoding_detectado, confianza
+        return detectar_encoding_muestra(muestra)
     except Exception as e:
         return None, 0
 
-def leer_csv_con_encoding(archivo) -> Tuple[Optional[pd.DataFrame], Optional[str], bool, Optional[str]]:
-    """Intenta leer el CSV con diferentes encodings"""
-    archivo.seek(0)
+def detectar_encoding_flujo(muestra: bytes) -> str:
+    """Encoding para leer un archivo por partes, decidido con su muestra inicial"""
+    if muestra.startswith(codecs.BOM_UTF8):
+        return 'utf-8-sig'
+    try:
+        # La muestra puede cortar un carácter multibyte al final
+        codecs.getincrementaldecoder('utf-8')().decode(muestra, final=False)
+        return 'utf-8'
+    except UnicodeDecodeError:
+        encoding_detectado, confianza = detectar_encoding_muestra(muestra)
+        return encoding_detectado if encoding_detectado and confianza > 0.7 else 'latin1'
+
+def decodificar_contenido(contenido: bytes) -> Tuple[str, str, float]:
+    """Decodifica el contenido completo una sola vez.
+    
+    Primero valida UTF-8 (con o sin BOM); si falla, usa un único encoding
+    detectado sobre la muestra y, como último recurso, latin1 (que acepta
+    cualquier secuencia de bytes). Devuelve (texto, encoding, confianza).
+    """
+    if contenido.startswith(codecs.BOM_UTF8):
+        try:
+            return contenido[len(codecs.BOM_UTF8):].decode('utf-8'), 'utf-8-sig', 1.0
+        except UnicodeDecodeError:
+            pass
+    else:
+        try:
+            return contenido.decode('utf-8'), 'utf-8', 1.0
+        except UnicodeDecodeError:
+            pass
+    
+    encoding_detectado, confianza = detectar_encoding_muestra(contenido[:TAMANO_MUESTRA])
+    if encoding_detectado and confianza > 0.7 and codecs.lookup(encoding_detectado).name != 'utf-8':
+        try:
+            return contenido.decode(encoding_detectado), encoding_detectado, confianza
+        except (UnicodeDecodeError, LookupError):
+            pass
+    
+    return contenido.decode('latin1'), 'latin1', 0.0
+
+def _lineas(texto: str):
+    """Líneas del texto, generadas sin partirlo completo"""
+    inicio = 0
+    while inicio < len(texto):
+        fin = texto.find('\n', inicio)
+        fin = len(texto) if fin < 0 else fin + 1
+        yield texto[inicio:fin]
+        inicio = fin
+
+# Separadores de campo que se prueban; Excel con configuración regional en
+# español exporta "CSV" separados por ';'
+DELIMITADORES_CSV = ',;\t|'
+
+DIALECTO_PREDETERMINADO = {'delimitador': ',', 'comillas': '"', 'decimal': '.'}
+
+NUMERO_COMA_DECIMAL = re.compile(r'^-?\d+,\d+$')
+NUMERO_PUNTO_DECIMAL = re.compile(r'^-?\d+\.\d+$')
+
+def detectar_dialecto(muestra: str) -> Dict[str, str]:
+    """Separador de campos, carácter de comillas y separador decimal de un CSV.
     
-    # Detectar encoding primero
-    encoding_detectado, confianza = detectar_encoding(archivo)
+    Se detectan con la muestra inicial ya decodificada (la misma que se usa
+    para el encoding): csv.Sniffer decide entre DELIMITADORES_CSV y, si no
+    puede o su elección no aparece en el encabezado, se usa el separador más
+    frecuente del encabezado. El separador decimal es ',' solo si el de campos
+    no lo es y en la muestra predominan los números con coma decimal.
+    """
+    muestra = muestra[:TAMANO_MUESTRA]
+    # La última línea de la muestra puede estar cortada
+    if '\n' in muestra.rstrip('\r\n'):
+        muestra = muestra[:muestra.rstrip('\r\n').rfind('\n') + 1]
+    encabezado = next((linea for linea in _lineas(muestra) if linea.strip()), '')
+    dialecto = dict(DIALECTO_PREDETERMINADO)
     
-    # Lista de encodings a probar
-    encodings_a_probar = ['utf-8', 'utf-8-sig', 'latin1', 'cp1252', 'iso-8859-1']
+    try:
+        detectado = csv.Sniffer().sniff(muestra, delimiters=DELIMITADORES_CSV)
+        delimitador, comillas = detectado.delimiter, detectado.quotechar
+    except csv.Error:
+        delimitador, comillas = None, dialecto['comillas']
+    if not delimitador or delimitador not in encabezado:
+        conteos = [(encabezado.count(candidato), candidato) for candidato in DELIMITADORES_CSV]
+        cuenta, delimitador = max(conteos, key=lambda conteo: conteo[0])
+        if not cuenta:
+            delimitador = dialecto['delimitador']
+    dialecto['delimitador'] = delimitador
+    if comillas in ('"', "'"):
+        dialecto['comillas'] = comillas
     
-    # Si detectamos un encoding con buena confianza, probarlo primero
-    if encoding_detectado and confianza > 0.7:
-        if encoding_detectado not in encodings_a_probar:
-            encodings_a_probar.insert(0, encoding_detectado)
+    if delimitador != ',':
+        campos = [
+            campo.strip() for fila in csv.reader(_lineas(muestra), **argumentos_csv(dialecto)) for campo in fila
+        ]
+        con_coma = sum(1 for campo in campos if NUMERO_COMA_DECIMAL.match(campo))
+        con_punto = sum(1 for campo in campos if NUMERO_PUNTO_DECIMAL.match(campo))
+        if con_coma > con_punto:
+            dialecto['decimal'] = ','
+    return dialecto
+
+def argumentos_csv(dialecto: Optional[Dict[str, str]]) -> Dict[str, str]:
+    """Argumentos de csv.reader para el dialecto detectado"""
+    dialecto = dialecto or DIALECTO_PREDETERMINADO
+    return {'delimiter': dialecto['delimitador'], 'quotechar': dialecto['comillas']}
+
+def argumentos_pandas(dialecto: Optional[Dict[str, str]]) -> Dict[str, str]:
+    """Argumentos de pd.read_csv para el dialecto detectado"""
+    dialecto = dialecto or DIALECTO_PREDETERMINADO
+    return {'sep': dialecto['delimitador'], 'quotechar': dialecto['comillas'], 'decimal': dialecto['decimal']}
+
+def describir_dialecto(dialecto: Dict[str, str]) -> str:
+    """Texto legible del dialecto para los reportes"""
+    delimitador = {'\t': 'tabulador'}.get(dialecto['delimitador'], f"'{dialecto['delimitador']}'")
+    return f"separador {delimitador}, comillas {dialecto['comillas']}, decimal '{dialecto['decimal']}'"
+
+def columnas_encabezado(texto: str, dialecto: Optional[Dict[str, str]] = None) -> List[str]:
+    """Columnas del encabezado de un CSV decodificado, sin recorrer las filas de datos.
     
-    for encoding in encodings_a_probar:
-        try:
-            archivo.seek(0)
-            df = pd.read_csv(archivo, encoding=encoding)
-            
-            # Verificar si es UTF-8 (formato requerido)
-            es_utf8 = encoding.lower() in ['utf-8', 'utf-8-sig']
-            
-            return df, encoding, es_utf8, None
-            
-        except (UnicodeDecodeError, pd.errors.EmptyDataError, Exception) as e:
-            continue
+    Solo se interpreta la línea del encabezado, sea cual sea su largo: una comilla
+    sin cerrar no hace que el lector recorra el resto del texto como un solo
+    campo. Si la línea no se puede interpretar devuelve una lista vacía.
+    """
+    # Como pandas, se saltan las líneas en blanco antes del encabezado
+    for linea in _lineas(texto):
+        if linea.strip('\r\n'):
+            try:
+                return next(csv.reader([linea], **argumentos_csv(dialecto)), [])
+            except csv.Error:
+                return []
+    return []
+
+def opciones_lectura(columnas: List[str], categoria: str) -> Dict[str, Any]:
+    """Argumentos de pd.read_csv para leer las columnas requeridas de la categoría.
     
-    return None, None, False, "No se pudo leer el archivo con ningún encoding conocido"
+    Las columnas que resuelven a una requerida se leen como texto (sin perder
+    ceros a la izquierda ni convertir 202511 en 202511.0) y las de pocos valores
+    distintos (COLUMNAS_CATEGORICAS) como categóricas; las claves de 'dtype' son
+    las columnas a conservar (ver seleccionar_columnas). Si ningún encabezado
+    resuelve no se filtra nada, para que verificar_estructura reporte las faltantes.
+    
+    No se usa usecols: con él pandas descarta en silencio los campos de más de
+    una fila, que sin él reporta como error de interpretación.
+    """
+    _, mapeo = resolver_encabezados(tuple(columnas), categoria)
+    if not mapeo:
+        return {'dtype': str}
+    
+    return {
+        'dtype': {
+            columna: 'category' if requerida in COLUMNAS_CATEGORICAS else str
+            for columna, requerida in mapeo.items()
+        },
+    }
+
+def seleccionar_columnas(df: pd.DataFrame, opciones: Dict[str, Any]) -> pd.DataFrame:
+    """Deja en df solo las columnas con tipo en opciones (ver opciones_lectura)"""
+    tipos = opciones.get('dtype')
+    return df[list(tipos)] if isinstance(tipos, dict) else df
+
+# Celdas que se leen como nulas: las de pandas por omisión, explícitas para que
+# ambos motores interpreten igual el archivo
+VALORES_NULOS = [
+    '', '#N/A', '#N/A N/A', '#NA', '-1.#IND', '-1.#QNAN', '-NaN', '-nan', '1.#IND', '1.#QNAN',
+    '<NA>', 'N/A', 'NA', 'NULL', 'NaN', 'None', 'n/a', 'nan', 'null'
+]
+
+def usar_pyarrow(motor: Optional[str] = None) -> bool:
+    """True si el motor configurado ('auto', 'pyarrow' o 'pandas') resuelve a pyarrow y está instalado"""
+    motor = motor or MOTOR_CSV
+    return pa_csv is not None and motor in ('auto', 'pyarrow')
+
+def leer_con_pyarrow(contenido: bytes, encoding: str, columnas: List[str], opciones: Dict[str, Any],
+                     dialecto: Optional[Dict[str, str]] = None) -> Optional[pd.DataFrame]:
+    """Interpreta el CSV con el lector multihilo de pyarrow y columnas de texto Arrow.
+    
+    Solo se usa cuando se conocen las columnas a cargar (opciones de
+    opciones_lectura): todas se leen como texto, así que el resultado es el
+    mismo que con pandas. Devuelve None si el archivo tiene algo que pyarrow
+    interpreta distinto (encabezados repetidos, filas con otro número de
+    campos...) para que se lea con pandas.
+    """
+    dialecto = dialecto or DIALECTO_PREDETERMINADO
+    tipos = opciones.get('dtype')
+    if not isinstance(tipos, dict) or len(set(columnas)) != len(columnas):
+        return None
+    
+    try:
+        tabla = pa_csv.read_csv(
+            io.BytesIO(contenido),
+            read_options=pa_csv.ReadOptions(
+                encoding='utf8' if encoding in ('utf-8', 'utf-8-sig') else encoding,
+                use_threads=True
+            ),
+            parse_options=pa_csv.ParseOptions(
+                delimiter=dialecto['delimitador'], quote_char=dialecto['comillas'], newlines_in_values=True
+            ),
+            convert_options=pa_csv.ConvertOptions(
+                include_columns=list(tipos),
+                column_types={columna: pa.string() for columna in tipos},
+                null_values=VALORES_NULOS,
+                strings_can_be_null=True,
+                quoted_strings_can_be_null=True,
+            ),
+        )
+    except (pa.ArrowInvalid, ValueError, LookupError):
+        return None
+    
+    df = tabla.to_pandas(types_mapper={pa.string(): pd.ArrowDtype(pa.string())}.get)
+    for columna, tipo in tipos.items():
+        if tipo == 'category':
+            df[columna] = df[columna].astype('category')
+    return df
+
+def ingerir_csv(archivo, categoria: Optional[str] = None, motor: Optional[str] = None) -> Dict[str, Any]:
+    """Lee los bytes una vez, los decodifica una vez y los interpreta una vez.
+    
+    El texto decodificado solo valida el encoding y da la muestra y el
+    encabezado; se libera antes de interpretar el CSV, que se lee de los bytes
+    con el encoding detectado (como texto ocuparía hasta cuatro veces más).
+    
+    Con categoria se cargan solo sus columnas requeridas, como texto o
+    categóricas (ver opciones_lectura); sin ella se cargan todas con los tipos
+    que infiere pandas. En el primer caso, si el motor lo permite (ver
+    usar_pyarrow), el CSV se interpreta con pyarrow y, si no se puede, con pandas.
+    
+    El separador, las comillas y el separador decimal se detectan con la
+    muestra inicial (ver detectar_dialecto) y el CSV se interpreta con ellos.
+    
+    El resultado reporta por separado el encoding, la confianza de la detección,
+    el dialecto y los errores de interpretación del CSV:
+    {'df', 'encoding', 'confianza', 'es_utf8', 'dialecto', 'error_parseo'}
+    """
+    with etapa('lectura'):
+        archivo.seek(0)
+        contenido = archivo.read()
+        archivo.seek(0)
+        if isinstance(contenido, str):
+            contenido = contenido.encode('utf-8')
+    
+    with etapa('encoding'):
+        texto, encoding, confianza = decodificar_contenido(contenido)
+        dialecto = detectar_dialecto(texto[:TAMANO_MUESTRA])
+    resultado = {
+        'df': None,
+        'encoding': encoding,
+        'confianza': confianza,
+        # Verificar si es UTF-8 (formato requerido)
+        'es_utf8': encoding in ('utf-8', 'utf-8-sig'),
+        'dialecto': dialecto,
+        'error_parseo': None,
+    }
+    
+    try:
+        opciones = {}
+        if categoria is not None:
+            with etapa('encabezados'):
+                columnas = columnas_encabezado(texto, dialecto)
+                opciones = opciones_lectura(columnas, categoria)
+        del texto
+        with etapa('lectura'):
+            if categoria is not None and usar_pyarrow(motor):
+                resultado['df'] = leer_con_pyarrow(contenido, encoding, columnas, opciones, dialecto)
+            if resultado['df'] is None:
+                resultado['df'] = seleccionar_columnas(pd.read_csv(
+                    io.BytesIO(contenido), encoding=encoding, na_values=VALORES_NULOS, keep_default_na=False,
+                    **argumentos_pandas(dialecto), **opciones
+                ), opciones)
+    except pd.errors.EmptyDataError:
+        resultado['error_parseo'] = "El archivo está vacío"
+    except (pd.errors.ParserError, csv.Error, ValueError) as e:
+        resultado['error_parseo'] = f"Error al interpretar el CSV: {e}"
+    
+    return resultado
+
+def leer_csv_con_encoding(archivo, categoria: Optional[str] = None, motor: Optional[str] = None
+                          ) -> Tuple[Optional[pd.DataFrame], Optional[str], bool, Optional[str]]:
+    """Lee el CSV decodificándolo una sola vez (ver ingerir_csv)"""
+    resultado = ingerir_csv(archivo, categoria, motor)
+    if resultado['df'] is None:
+        return None, resultado['encoding'], resultado['es_utf8'], resultado['error_parseo']
+    return resultado['df'], resultado['encoding'], resultado['es_utf8'], None
 
 def validar_matricula(matricula) -> Tuple[bool, Optional[str], Optional[str]]:
     """Valida y corrige formato de matrícula"""
@@ -91,9 +408,14 @@ def validar_email_mentoreo(email, matricula) -> Tuple[bool, Optional[str]]:
     
     return True, None
 
-def validar_valor_con_correccion(valor, lista_valores: List[str], nombre_campo: str, 
+def validar_valor_con_correccion(valor, lista_valores: Union[List[str], IndiceOpciones], nombre_campo: str, 
                                 corrector: CorrectorLocal) -> Tuple[bool, Optional[str], Optional[str]]:
-    """Valida un valor contra una lista, usando corrección local"""
+    """Valida un valor contra una lista, usando corrección local.
+    
+    Para vocabularios grandes conviene pasar un índice construido una sola vez
+    con corrector.construir_indice, que limita la búsqueda a los candidatos de
+    su índice de n-gramas.
+    """
     if pd.isna(valor):
         return False, f"{nombre_campo} no puede estar vacío", None
     
@@ -116,19 +438,337 @@ def validar_valor_con_correccion(valor, lista_valores: List[str], nombre_campo:
         return True, None, valor_corregido
     
     # Si no se pudo corregir
-    return False, f"{nombre_campo} '{valor_str}' no es válido. Opciones: {', '.join(lista_valores[:3])}{'...' if len(lista_valores) > 3 else ''}", None
+    primeras_opciones = ', '.join(itertools.islice(lista_valores, 3))
+    return False, f"{nombre_campo} '{valor_str}' no es válido. Opciones: {primeras_opciones}{'...' if len(lista_valores) > 3 else ''}", None
 
-def auditar_archivo(df: pd.DataFrame, nombre_archivo: str, categoria: str, 
-                   encoding_usado: str, es_utf8: bool, corrector: CorrectorLocal) -> Tuple[List[str], int, int, List[str]]:
-    """Audita un archivo CSV según la categoría"""
-    errores = []
-    advertencias = []
-    correcciones = []
+def _como_texto(serie: pd.Series) -> pd.Series:
+    """Convierte una columna a su representación str(), conservando los nulos como NaN"""
+    return serie.astype(str).where(serie.notna())
+
+def _vacios(texto: pd.Series) -> pd.Series:
+    """Máscara de valores nulos o que solo contienen espacios"""
+    return texto.isna() | (texto.str.strip() == "")
+
+def evaluar_reglas(df: pd.DataFrame, categoria: str, corrector: CorrectorLocal,
+                   mapeo_columnas: Optional[Dict[str, str]] = None
+                   ) -> Tuple[np.ndarray, pd.DataFrame, List[str], List[Tuple[str, str, str, int]]]:
+    """Evalúa cada regla una sola vez sobre la columna completa.
+    
+    Cada regla produce una máscara booleana de filas inválidas; las máscaras se
+    combinan en el vector de validez por fila. Los errores se registran solo para
+    las filas que fallan, ordenados por fila y por orden de regla, igual que en
+    el recorrido fila por fila.
+    
+    Los campos con lista de valores válidos se corrigen (salvo los de
+    COLUMNAS_NO_CORREGIBLES) por valor distinto con
+    CorrectorLocal.corregir_batch; cada corrección se reporta una vez como
+    (campo, valor, corrección, filas). Las correcciones de matrícula son por fila.
+    
+    Las columnas requeridas se leen de df a través de mapeo_columnas (columna
+    del archivo → columna requerida, ver verificar_estructura), sin copiar ni
+    renombrar el DataFrame; sin mapeo se usan los nombres tal cual.
+    """
     config = CATEGORIAS_CONFIG[categoria]
+    if mapeo_columnas is None:
+        origen = {columna: columna for columna in df.columns}
+    else:
+        origen = {requerida: columna for columna, requerida in mapeo_columnas.items()}
+    columnas = origen.keys()
+    n_filas = len(df)
+    filas = pd.Series(df.index + 2, index=df.index).astype(str)
     
-    # Advertencia si no es UTF-8
-    if not es_utf8:
-        advertencias.append(f"Archivo no en UTF-8 (detectado: {encoding_usado})")
+    def columna(nombre):
+        return df[origen[nombre]]
+    
+    invalidos = np.zeros(n_filas, dtype=bool)
+    fallas = []
+    cambios = []
+    correcciones_valores = []
+    
+    def seleccionar(valores, posiciones):
+        # valores puede ser un escalar, una Serie de la columna completa o una
+        # Serie ya filtrada a las filas de la máscara
+        if isinstance(valores, (pd.Series, np.ndarray)):
+            valores = np.asarray(valores, dtype=object)
+            if len(valores) != len(posiciones):
+                valores = valores[posiciones]
+            return valores
+        return np.full(len(posiciones), valores, dtype=object)
+    
+    def fallar(mascara, codigo, columna, valor=None, detalle=None):
+        nonlocal invalidos
+        mascara = np.asarray(mascara, dtype=bool)
+        if mascara.any():
+            posiciones = np.flatnonzero(mascara)
+            fallas.append((posiciones, len(fallas), {
+                'codigo': seleccionar(codigo, posiciones),
+                'columna': seleccionar(columna, posiciones),
+                'valor': seleccionar(valor, posiciones),
+                'detalle': seleccionar(detalle, posiciones),
+            }))
+            invalidos |= mascara
+    
+    def corregir(mascara, mensajes):
+        mascara = np.asarray(mascara, dtype=bool)
+        if mascara.any():
+            posiciones = np.flatnonzero(mascara)
+            cambios.append((posiciones, len(cambios), seleccionar(mensajes, posiciones)))
+    
+    # Validar EJERCICIO_ACADEMICO
+    ejercicio_col = 'EJERCICIO_ACADEMICO' if 'EJERCICIO_ACADEMICO' in columnas else 'Ejercicio Académico'
+    if ejercicio_col in columnas:
+        ejercicio = _como_texto(columna(ejercicio_col))
+        invalido = ejercicio.isna() | (ejercicio.str.strip() != "202511")
+        fallar(invalido, 'ejercicio_invalido', ejercicio_col, ejercicio[invalido])
+    
+    # Validar NOMBRE no vacío
+    nombre_col = 'NOMBRE' if 'NOMBRE' in columnas else 'Nombre completo'
+    if nombre_col in columnas:
+        fallar(_vacios(_como_texto(columna(nombre_col))), 'nombre_vacio', nombre_col)
+    
+    # Validar APELLIDO PATERNO no vacío
+    if 'APELLIDO PATERNO' in columnas:
+        fallar(_vacios(_como_texto(columna('APELLIDO PATERNO'))), 'apellido_vacio', 'APELLIDO PATERNO')
+    
+    # Validar MATRICULA
+    matricula_col = 'MATRICULA' if 'MATRICULA' in columnas else 'MATRÍCULA' if 'MATRÍCULA' in columnas else 'Matrícula'
+    if matricula_col in columnas:
+        matricula = _como_texto(columna(matricula_col))
+        matricula_nula = matricula.isna()
+        matricula_limpia = matricula.str.strip()
+        matricula_corregida = matricula_limpia.str.upper()
+        sin_prefijo = ~matricula_corregida.str.startswith('A').fillna(False).astype(bool)
+        matricula_corregida = matricula_corregida.where(~sin_prefijo, 'A' + matricula_corregida)
+        longitud = matricula_corregida.str.len()
+        longitud_invalida = ~matricula_nula & (longitud != 9)
+        formato_invalido = (~matricula_nula & ~longitud_invalida
+                            & ~matricula_corregida.str.match(r'^A\d{8}$').fillna(False).astype(bool))
+        invalida = matricula_nula | longitud_invalida | formato_invalido
+        
+        codigos = np.where(matricula_nula, 'matricula_vacia',
+                           np.where(longitud_invalida, 'matricula_longitud', 'matricula_formato'))
+        longitudes = longitud[invalida].astype('Int64').astype(str).where(longitud_invalida[invalida])
+        fallar(invalida, codigos[invalida.to_numpy()], matricula_col, matricula[invalida], longitudes)
+        
+        corregida = ~invalida & (matricula_corregida != matricula_limpia)
+        corregir(corregida,
+                 "Matrícula corregida en fila " + filas[corregida] + ": "
+                 + columna(matricula_col)[corregida].astype(str)
+                 + " → " + matricula_corregida[corregida])
+    
+    # Validar CLAVE
+    if 'CLAVE' in columnas and config['claves_validas']:
+        clave = _como_texto(columna('CLAVE'))
+        invalida = clave.isna() | ~clave.str.strip().isin(config['claves_validas'])
+        fallar(invalida, 'clave_invalida', 'CLAVE', clave[invalida])
+    
+    # Validaciones especiales según categoría
+    for campo, valores_permitidos in config['validaciones_especiales'].items():
+        if campo not in columnas:
+            continue
+        valores = _como_texto(columna(campo))
+        
+        if campo == 'Email' and categoria == 'Mentoreo':
+            matricula_email = _como_texto(columna(matricula_col))
+            email_esperado = matricula_email.str.strip().str.upper() + "@tec.mx"
+            nulos = valores.isna() | matricula_email.isna()
+            distinto = ~nulos & (valores.str.strip().str.lower() != email_esperado.str.lower())
+            fallar(nulos, 'email_vacio', campo, valores[nulos])
+            fallar(distinto, 'email_invalido', campo, valores[distinto], email_esperado[distinto])
+        elif valores_permitidos is None:
+            fallar(_vacios(valores), 'campo_vacio', campo)
+        elif isinstance(valores_permitidos, list):
+            limpios = valores.str.strip()
+            vacios = (valores.isna() | (limpios == "")).to_numpy(dtype=bool)
+            
+            # Cada valor distinto se resuelve una sola vez y se propaga a sus filas
+            codigos_valor, unicos = pd.factorize(limpios)
+            unicos = pd.Index(unicos, dtype=object)
+            ya_validos = unicos.isin(valores_permitidos)
+            # Los campos de nombres o ejercicio académico no se corrigen
+            mapa = {}
+            if campo not in COLUMNAS_NO_CORREGIBLES:
+                with etapa('correccion'):
+                    mapa = corrector.corregir_batch(
+                        {campo: list(unicos[~ya_validos])}, {campo: corrector.obtener_indice(valores_permitidos)}
+                    ).get(campo, {})
+            resueltos = np.array([
+                valor if valido else mapa.get(valor)
+                for valor, valido in zip(unicos, ya_validos)
+            ], dtype=object)
+            
+            resuelto_por_fila = np.full(n_filas, None, dtype=object)
+            con_valor = codigos_valor >= 0
+            resuelto_por_fila[con_valor] = resueltos[codigos_valor[con_valor]]
+            no_validos = ~vacios & pd.isna(resuelto_por_fila)
+            
+            codigos = np.where(vacios, 'campo_vacio', 'valor_invalido')
+            opciones = f"{', '.join(valores_permitidos[:3])}{'...' if len(valores_permitidos) > 3 else ''}"
+            invalido = vacios | no_validos
+            fallar(invalido, codigos[invalido], campo, limpios[invalido],
+                   np.where(vacios[invalido], None, opciones))
+            
+            filas_por_valor = np.bincount(codigos_valor[con_valor], minlength=len(unicos))
+            for posicion in np.flatnonzero(~ya_validos):
+                valor = unicos[posicion]
+                if valor in mapa:
+                    correcciones_valores.append((campo, valor, mapa[valor], int(filas_por_valor[posicion])))
+    
+    registro_errores = _registro_errores(df.index, fallas)
+    correcciones = []
+    if cambios:
+        posiciones, orden = _orden_por_fila(cambios)
+        correcciones = np.concatenate([c[2] for c in cambios])[orden].tolist()
+    
+    return ~invalidos, registro_errores, correcciones, correcciones_valores
+
+def formatear_correcciones_valor(correcciones_valores: List[Tuple[str, str, str, int]]) -> List[str]:
+    """Mensaje de cada corrección por valor distinto, con el número de filas afectadas"""
+    return [
+        f"{campo} corregido: '{valor}' → '{corregido}' ({filas} filas)"
+        for campo, valor, corregido, filas in correcciones_valores
+    ]
+
+def _orden_por_fila(registros) -> Tuple[np.ndarray, np.ndarray]:
+    """Orden que agrupa los registros por fila y, dentro de cada fila, por orden de regla"""
+    posiciones = np.concatenate([r[0] for r in registros])
+    reglas = np.concatenate([np.full(len(r[0]), r[1]) for r in registros])
+    orden = np.lexsort((reglas, posiciones))
+    return posiciones[orden], orden
+
+def _registro_errores(indice: pd.Index, fallas) -> pd.DataFrame:
+    """Construye el registro columnar de errores a partir de las fallas de cada regla"""
+    if not fallas:
+        return registro_errores_vacio()
+    posiciones, orden = _orden_por_fila(fallas)
+    datos = {
+        campo: np.concatenate([f[2][campo] for f in fallas])[orden]
+        for campo in ('codigo', 'columna', 'valor', 'detalle')
+    }
+    return pd.DataFrame({
+        'codigo': pd.Categorical(datos['codigo'], categories=list(MENSAJES_ERROR)),
+        'columna': pd.Categorical(datos['columna']),
+        'fila': np.asarray(indice)[posiciones],
+        'valor': datos['valor'],
+        'detalle': datos['detalle'],
+    })
+
+def registro_errores_vacio() -> pd.DataFrame:
+    """Registro de errores sin filas, con las mismas columnas y tipos"""
+    return pd.DataFrame({
+        'codigo': pd.Categorical([], categories=list(MENSAJES_ERROR)),
+        'columna': pd.Categorical([]),
+        'fila': np.array([], dtype=np.int64),
+        'valor': np.array([], dtype=object),
+        'detalle': np.array([], dtype=object),
+    })
+
+def formatear_errores(registro_errores: pd.DataFrame) -> List[str]:
+    """Genera el mensaje "Fila N: ..." de cada error del registro"""
+    mensajes = []
+    for codigo, columna, fila, valor, detalle in registro_errores.itertuples(index=False):
+        texto = MENSAJES_ERROR[codigo].format(
+            columna=columna, valor='nan' if pd.isna(valor) else valor, detalle=detalle
+        )
+        mensajes.append(f"Fila {fila + 2}: {texto}")
+    return mensajes
+
+def contar_tipos_error(registro_errores: pd.DataFrame, ordenar: bool = True) -> pd.DataFrame:
+    """Cuenta los errores por tipo (código y columna), de mayor a menor.
+    
+    Los empates quedan en el orden en que aparece cada tipo; sin ordenar se
+    conserva solo ese orden (para combinar_conteos).
+    """
+    conteo = (registro_errores
+              .groupby(['codigo', 'columna'], observed=True, sort=False)
+              .size()
+              .reset_index(name='casos'))
+    if ordenar:
+        conteo = conteo.sort_values('casos', ascending=False, kind='stable')
+    conteo['tipo'] = [
+        TIPOS_ERROR[codigo].format(columna=columna)
+        for codigo, columna in zip(conteo['codigo'], conteo['columna'])
+    ]
+    return conteo[['codigo', 'columna', 'tipo', 'casos']].reset_index(drop=True)
+
+def combinar_conteos(conteos: List[pd.DataFrame]) -> pd.DataFrame:
+    """Suma conteos por tipo de error (por ejemplo, de varios bloques de un archivo).
+    
+    Los conteos deben ir en el orden del archivo y sin ordenar (ver
+    contar_tipos_error), para que los empates queden como con el archivo completo.
+    """
+    conteos = [conteo for conteo in conteos if len(conteo)]
+    if not conteos:
+        return contar_tipos_error(registro_errores_vacio())
+    return (pd.concat(conteos, ignore_index=True)
+            .groupby(['codigo', 'columna', 'tipo'], observed=True, sort=False)['casos']
+            .sum()
+            .reset_index()
+            .sort_values('casos', ascending=False, kind='stable')
+            .reset_index(drop=True)[['codigo', 'columna', 'tipo', 'casos']])
+
+def resumir_conteo(conteo: pd.DataFrame, limite: Optional[int] = None) -> List[str]:
+    """Resume un conteo por tipo como "tipo: N casos", de mayor a menor"""
+    if limite is not None:
+        conteo = conteo.head(limite)
+    return [f"{tipo}: {casos} casos" for tipo, casos in zip(conteo['tipo'], conteo['casos'])]
+
+def resumir_errores(registro_errores: pd.DataFrame, limite: Optional[int] = None) -> List[str]:
+    """Resume el registro de errores como "tipo: N casos", de mayor a menor"""
+    return resumir_conteo(contar_tipos_error(registro_errores), limite)
+
+def describir_errores(registro_errores: pd.DataFrame, max_detalle: int = 5) -> List[str]:
+    """Detalla cada fila si hay pocos errores; si hay muchos, los resume por tipo"""
+    if len(registro_errores) > max_detalle:
+        return resumir_errores(registro_errores)
+    return formatear_errores(registro_errores)
+
+def normalizar_encabezado(nombre) -> str:
+    """Forma comparable de un encabezado: sin acentos, en minúsculas y sin espacios ni guiones bajos"""
+    return re.sub(r'[\s_]+', '', normalizar_texto(nombre))
+
+@functools.lru_cache(maxsize=None)
+def indice_alias(categoria: str) -> Dict[str, str]:
+    """Encabezado normalizado → columna requerida de la categoría, incluidos los alias de config"""
+    indice = {}
+    for columna in CATEGORIAS_CONFIG[categoria]['columnas_requeridas']:
+        for alias in [columna] + ALIAS_COLUMNAS.get(columna, []):
+            indice.setdefault(normalizar_encabezado(alias), columna)
+    return indice
+
+@functools.lru_cache(maxsize=256)
+def resolver_encabezados(columnas: Tuple[str, ...], categoria: str) -> Tuple[Tuple[str, ...], Dict[str, str]]:
+    """Resuelve los encabezados de un archivo contra las columnas requeridas.
+    
+    Devuelve (columnas requeridas faltantes, mapeo de columna del archivo a
+    columna requerida). Si varias columnas del archivo resuelven a la misma
+    columna requerida se usa la primera. El resultado se cachea por encabezado,
+    que suele ser idéntico en todos los archivos de campus de una categoría; no
+    debe modificarse.
+    """
+    indice = indice_alias(categoria)
+    mapeo = {}
+    resueltas = set()
+    for columna in columnas:
+        requerida = indice.get(normalizar_encabezado(columna))
+        if requerida is not None and requerida not in resueltas:
+            mapeo[columna] = requerida
+            resueltas.add(requerida)
+    
+    faltantes = tuple(
+        columna for columna in CATEGORIAS_CONFIG[categoria]['columnas_requeridas'] if columna not in resueltas
+    )
+    return faltantes, mapeo
+
+def verificar_estructura(columnas: List[str], nombre_archivo: str,
+                         categoria: str) -> Tuple[List[str], List[str], Dict[str, str]]:
+    """Verifica el nombre del archivo y las columnas requeridas.
+    
+    Devuelve (errores, columnas_faltantes, mapeo de columna del archivo a
+    columna requerida).
+    """
+    errores = []
+    config = CATEGORIAS_CONFIG[categoria]
     
     # Verificar nombre de archivo
     if categoria != 'Mentoreo':
@@ -140,121 +780,373 @@ def auditar_archivo(df: pd.DataFrame, nombre_archivo: str, categoria: str,
             if campus_detectado not in CAMPUS_CODES:
                 errores.append(f"Campus '{campus_detectado}' no es válido")
     
-    # Verificar columnas requeridas
-    columnas_faltantes = []
-    for col in config['columnas_requeridas']:
-        if col not in df.columns:
-            col_encontrada = False
-            for df_col in df.columns:
-                if col.lower().replace(' ', '').replace('_', '') == df_col.lower().replace(' ', '').replace('_', ''):
-                    col_encontrada = True
-                    break
-            if not col_encontrada:
-                columnas_faltantes.append(col)
+    # Verificar columnas requeridas (resolución cacheada por encabezado)
+    faltantes, mapeo = resolver_encabezados(tuple(columnas), categoria)
+    columnas_faltantes = list(faltantes)
     
     if columnas_faltantes:
         errores.append(f"Columnas faltantes: {', '.join(columnas_faltantes)}")
-        return errores + advertencias, len(df), 0, correcciones
+        return errores, columnas_faltantes, {}
     
-    # Normalizar nombres de columnas
-    df_normalizado = df.copy()
-    mapeo_columnas = {}
-    for col_requerida in config['columnas_requeridas']:
-        for df_col in df.columns:
-            if col_requerida.lower().replace(' ', '').replace('_', '') == df_col.lower().replace(' ', '').replace('_', ''):
-                mapeo_columnas[df_col] = col_requerida
-                break
+    # Mapeo de columna del archivo a columna requerida
+    mapeo_columnas = dict(mapeo)
     
-    df_normalizado = df_normalizado.rename(columns=mapeo_columnas)
+    return errores, columnas_faltantes, mapeo_columnas
+
+def leer_encabezado(archivo, encoding: Optional[str] = None) -> Tuple[List[str], str, Dict[str, str]]:
+    """Columnas del encabezado, encoding y dialecto de la muestra, sin leer las filas de datos.
     
-    registros_validos = 0
-    total_registros = len(df_normalizado)
-    errores_registros = []
+    Si no se indica el encoding se detecta con la muestra.
+    """
+    archivo.seek(0)
+    muestra = archivo.read(TAMANO_MUESTRA)
+    # El encabezado (tras las líneas en blanco) puede ser más largo que la muestra
+    while muestra and b'\n' not in muestra.lstrip(b'\r\n'):
+        bloque = archivo.read(TAMANO_MUESTRA)
+        if not bloque:
+            break
+        muestra += bloque
+    archivo.seek(0)
     
-    for idx, row in df_normalizado.iterrows():
-        registro_valido = True
-        
-        # Validar EJERCICIO_ACADEMICO
-        ejercicio_col = 'EJERCICIO_ACADEMICO' if 'EJERCICIO_ACADEMICO' in df_normalizado.columns else 'Ejercicio Académico'
-        if ejercicio_col in df_normalizado.columns:
-            if pd.isna(row[ejercicio_col]) or str(row[ejercicio_col]).strip() != "202511":
-                errores_registros.append(f"Fila {idx+2}: Ejercicio académico debe ser '202511'")
-                registro_valido = False
-        
-        # Validar NOMBRE no vacío
-        nombre_col = 'NOMBRE' if 'NOMBRE' in df_normalizado.columns else 'Nombre completo'
-        if nombre_col in df_normalizado.columns:
-            if pd.isna(row[nombre_col]) or str(row[nombre_col]).strip() == "":
-                errores_registros.append(f"Fila {idx+2}: Nombre no puede estar vacío")
-                registro_valido = False
-        
-        # Validar APELLIDO PATERNO no vacío
-        if 'APELLIDO PATERNO' in df_normalizado.columns:
-            if pd.isna(row['APELLIDO PATERNO']) or str(row['APELLIDO PATERNO']).strip() == "":
-                errores_registros.append(f"Fila {idx+2}: Apellido paterno no puede estar vacío")
-                registro_valido = False
-        
-        # Validar MATRICULA
-        matricula_col = 'MATRICULA' if 'MATRICULA' in df_normalizado.columns else 'MATRÍCULA' if 'MATRÍCULA' in df_normalizado.columns else 'Matrícula'
-        if matricula_col in df_normalizado.columns:
-            valida, error_msg, matricula_corregida = validar_matricula(row[matricula_col])
-            if not valida:
-                errores_registros.append(f"Fila {idx+2}: {error_msg}")
-                registro_valido = False
-            elif matricula_corregida != str(row[matricula_col]).strip():
-                correcciones.append(f"Matrícula corregida en fila {idx+2}: {row[matricula_col]} → {matricula_corregida}")
-        
-        # Validar CLAVE
-        if 'CLAVE' in df_normalizado.columns and config['claves_validas']:
-            if pd.isna(row['CLAVE']) or str(row['CLAVE']).strip() not in config['claves_validas']:
-                errores_registros.append(f"Fila {idx+2}: Clave '{row['CLAVE']}' no válida")
-                registro_valido = False
-        
-        # Validaciones especiales según categoría
-        for campo, valores_permitidos in config['validaciones_especiales'].items():
-            if campo in df_normalizado.columns:
-                if campo == 'Email' and categoria == 'Mentoreo':
-                    valida, error_msg = validar_email_mentoreo(row[campo], row[matricula_col])
-                    if not valida:
-                        errores_registros.append(f"Fila {idx+2}: {error_msg}")
-                        registro_valido = False
-                elif valores_permitidos is None:
-                    if pd.isna(row[campo]) or str(row[campo]).strip() == "":
-                        errores_registros.append(f"Fila {idx+2}: {campo} no puede estar vacío")
-                        registro_valido = False
-                elif isinstance(valores_permitidos, list):
-                    valida, error_msg, valor_corregido = validar_valor_con_correccion(
-                        row[campo], valores_permitidos, campo, corrector
+    if encoding is None:
+        with etapa('encoding'):
+            encoding = detectar_encoding_flujo(muestra)
+    texto = muestra.decode(encoding, errors='replace')
+    dialecto = detectar_dialecto(texto)
+    return columnas_encabezado(texto, dialecto), encoding, dialecto
+
+def prevalidar_estructura(archivo, nombre_archivo: str, categoria: str) -> Optional[Dict[str, Any]]:
+    """Revisa el nombre del archivo y su encabezado antes de leer las filas.
+    
+    Si la estructura no es válida (nombre, campus o columnas requeridas) devuelve
+    el resultado del archivo, con la forma de auditar_archivo_subido y sin
+    registros auditados; si es válida devuelve None y el archivo se audita
+    completo. Los archivos vacíos o ilegibles también se dejan a la auditoría
+    completa, que reporta el problema concreto.
+    """
+    columnas, encoding, dialecto = leer_encabezado(archivo)
+    if not columnas:
+        return None
+    
+    with etapa('encabezados'):
+        errores, columnas_faltantes, mapeo_columnas = verificar_estructura(columnas, nombre_archivo, categoria)
+    if not errores:
+        return None
+    
+    es_utf8 = encoding in ('utf-8', 'utf-8-sig')
+    resultado = {
+        'nombre': nombre_archivo,
+        'campus': detectar_campus(nombre_archivo, categoria),
+        'leido': True,
+        'rechazado': True,
+        'problemas': [],
+        'errores': errores,
+        'encoding': encoding,
+        'es_utf8': es_utf8,
+        'dialecto': dialecto,
+        'total_registros': 0,
+        'registros_validos': 0,
+        'correcciones': [],
+    }
+    if not es_utf8:
+        resultado['errores'] = errores + [f"Archivo no en UTF-8 (detectado: {encoding})"]
+        resultado['problemas'].append(
+            f"No está en formato UTF-8 (detectado: {encoding}). Se recomienda convertir a UTF-8."
+        )
+    return resultado
+
+def auditar_archivo(df: pd.DataFrame, nombre_archivo: str, categoria: str, 
+                   encoding_usado: str, es_utf8: bool,
+                   corrector: CorrectorLocal, max_detalle: int = 1000
+                   ) -> Tuple[List[str], int, int, List[str], pd.DataFrame]:
+    """Audita un archivo CSV según la categoría.
+    
+    Los errores estructurales y advertencias se devuelven como texto; los errores
+    por fila quedan en el registro columnar (ver describir_errores/resumir_errores).
+    Como en auditar_csv_por_bloques, se guardan como máximo max_detalle
+    correcciones por fila.
+    """
+    advertencias = []
+    
+    # Advertencia si no es UTF-8
+    if not es_utf8:
+        advertencias.append(f"Archivo no en UTF-8 (detectado: {encoding_usado})")
+    
+    with etapa('encabezados'):
+        errores, columnas_faltantes, mapeo_columnas = verificar_estructura(
+            list(df.columns), nombre_archivo, categoria
+        )
+    if columnas_faltantes:
+        return errores + advertencias, len(df), 0, [], registro_errores_vacio()
+    
+    # Las reglas leen las columnas a través del mapeo: el DataFrame no se copia
+    total_registros = len(df)
+    with etapa('validacion'):
+        validos, registro_errores, correcciones, correcciones_valores = evaluar_reglas(
+            df, categoria, corrector, mapeo_columnas
+        )
+        registros_validos = int(validos.sum())
+        if len(correcciones) > max_detalle:
+            omitidas = len(correcciones) - max_detalle
+            correcciones = correcciones[:max_detalle] + [f"... y {omitidas} correcciones por fila más"]
+        correcciones.extend(formatear_correcciones_valor(correcciones_valores))
+    
+    return errores + advertencias, total_registros, registros_validos, correcciones, registro_errores
+
+def auditar_csv_por_bloques(archivo, nombre_archivo: str, categoria: str, corrector: CorrectorLocal,
+                            tamano_bloque: int = 50000, max_detalle: int = 1000) -> Dict[str, Any]:
+    """Audita un CSV grande leyéndolo por bloques de tamano_bloque filas.
+    
+    El archivo nunca se carga completo: por cada bloque se acumulan los registros
+    válidos, el conteo por tipo de error y las correcciones, así que la memoria
+    depende del tamaño del bloque y no del archivo. Se guardan como máximo
+    max_detalle errores y correcciones por fila.
+    
+    Devuelve un diccionario con 'errores' (estructurales y advertencias),
+    'encoding', 'es_utf8', 'dialecto', 'total_registros', 'registros_validos',
+    'correcciones', 'conteo_errores' (ver contar_tipos_error),
+    'registro_errores' (los primeros max_detalle errores por fila) y
+    'error_parseo'. Si el CSV no se puede interpretar, igual que en ingerir_csv,
+    'error_parseo' lleva el motivo y no se reportan registros ni correcciones de
+    los bloques leídos antes del error.
+    """
+    with etapa('encoding'):
+        archivo.seek(0)
+        muestra = archivo.read(TAMANO_MUESTRA)
+        archivo.seek(0)
+        encoding = detectar_encoding_flujo(muestra)
+    
+    try:
+        return _auditar_bloques(archivo, encoding, nombre_archivo, categoria, corrector, tamano_bloque, max_detalle)
+    except UnicodeDecodeError:
+        # El error de encoding apareció después de la muestra: se repite con latin1,
+        # que acepta cualquier secuencia de bytes
+        return _auditar_bloques(archivo, 'latin1', nombre_archivo, categoria, corrector, tamano_bloque, max_detalle)
+
+def _auditar_bloques(archivo, encoding: str, nombre_archivo: str, categoria: str, corrector: CorrectorLocal,
+                     tamano_bloque: int, max_detalle: int) -> Dict[str, Any]:
+    resultado = {
+        'errores': [],
+        'encoding': encoding,
+        'es_utf8': encoding in ('utf-8', 'utf-8-sig'),
+        'dialecto': DIALECTO_PREDETERMINADO,
+        'total_registros': 0,
+        'registros_validos': 0,
+        'correcciones': [],
+        'conteo_errores': contar_tipos_error(registro_errores_vacio()),
+        'registro_errores': registro_errores_vacio(),
+        'error_parseo': None,
+    }
+    advertencias = []
+    if not resultado['es_utf8']:
+        advertencias.append(f"Archivo no en UTF-8 (detectado: {encoding})")
+    
+    conteos = []
+    registros_detalle = []
+    errores_guardados = 0
+    correcciones_fila = []
+    correcciones_omitidas = 0
+    # (campo, valor, corrección) -> filas, en orden de aparición
+    correcciones_valor = {}
+    mapeo_columnas = None
+    
+    with etapa('encabezados'):
+        columnas, _, resultado['dialecto'] = leer_encabezado(archivo, encoding)
+        opciones = opciones_lectura(columnas, categoria)
+    
+    archivo.seek(0)
+    texto = io.TextIOWrapper(archivo, encoding=encoding, newline='')
+    try:
+        bloques = pd.read_csv(
+            texto, chunksize=tamano_bloque, **argumentos_pandas(resultado['dialecto']), **opciones
+        )
+        for bloque in medir_iteracion(bloques, 'lectura'):
+            bloque = seleccionar_columnas(bloque, opciones)
+            if mapeo_columnas is None:
+                with etapa('encabezados'):
+                    errores, columnas_faltantes, mapeo_columnas = verificar_estructura(
+                        list(bloque.columns), nombre_archivo, categoria
                     )
-                    if not valida:
-                        errores_registros.append(f"Fila {idx+2}: {error_msg}")
-                        registro_valido = False
-                    elif valor_corregido and valor_corregido != str(row[campo]).strip():
-                        correcciones.append(f"{campo} corregido en fila {idx+2}: {row[campo]} → {valor_corregido}")
-        
-        if registro_valido:
-            registros_validos += 1
-    
-    # Combinar errores estructurales y de registros
-    todos_errores = errores + advertencias
-    
-    # Resumir errores de registros si hay muchos
-    if len(errores_registros) > 5:
-        tipos_errores = {}
-        for error in errores_registros:
-            if ':' in error:
-                tipo = error.split(':', 2)[2].strip() if error.count(':') >= 2 else error.split(':', 1)[1].strip()
-            else:
-                tipo = error
+                resultado['errores'] = errores
+                if columnas_faltantes:
+                    # Solo se cuentan las filas restantes, sin validarlas
+                    resultado['total_registros'] = len(bloque) + sum(len(resto) for resto in medir_iteracion(bloques, 'lectura'))
+                    break
+            
+            with etapa('validacion'):
+                validos, registro_errores, correcciones, correcciones_valores = evaluar_reglas(
+                    bloque, categoria, corrector, mapeo_columnas
+                )
+            resultado['total_registros'] += len(bloque)
+            resultado['registros_validos'] += int(validos.sum())
             
-            if tipo not in tipos_errores:
-                tipos_errores[tipo] = 1
-            else:
-                tipos_errores[tipo] += 1
+            conteos.append(contar_tipos_error(registro_errores, ordenar=False))
+            if errores_guardados < max_detalle and len(registro_errores):
+                registros_detalle.append(registro_errores.head(max_detalle - errores_guardados))
+                errores_guardados += len(registros_detalle[-1])
+            
+            espacio = max_detalle - len(correcciones_fila)
+            correcciones_fila.extend(correcciones[:espacio])
+            correcciones_omitidas += max(0, len(correcciones) - espacio)
+            for campo, valor, corregido, filas in correcciones_valores:
+                clave = (campo, valor, corregido)
+                correcciones_valor[clave] = correcciones_valor.get(clave, 0) + filas
+    except pd.errors.EmptyDataError:
+        resultado['error_parseo'] = "El archivo está vacío"
+    except (pd.errors.ParserError, csv.Error) as e:
+        resultado['error_parseo'] = f"Error al interpretar el CSV: {e}"
+    finally:
+        # Se separa el lector de texto para que no cierre el archivo original
+        texto.detach()
+    
+    if resultado['error_parseo'] is not None:
+        # Los totales de los bloques anteriores al error no describen el archivo
+        resultado.update(errores=advertencias, total_registros=0, registros_validos=0)
+        return resultado
+    
+    resultado['errores'] += advertencias
+    with etapa('combinacion'):
+        resultado['conteo_errores'] = combinar_conteos(conteos)
+        if registros_detalle:
+            resultado['registro_errores'] = pd.concat(registros_detalle, ignore_index=True)
+        if correcciones_omitidas:
+            correcciones_fila.append(f"... y {correcciones_omitidas} correcciones por fila más")
+        # Por campo en el orden de la configuración, como en auditar_archivo
+        orden_campos = list(CATEGORIAS_CONFIG[categoria]['validaciones_especiales'])
+        resultado['correcciones'] = correcciones_fila + formatear_correcciones_valor(sorted(
+            [(campo, valor, corregido, filas) for (campo, valor, corregido), filas in correcciones_valor.items()],
+            key=lambda correccion: orden_campos.index(correccion[0])
+        ))
+    return resultado
+
+def detectar_campus(nombre_archivo: str, categoria: str) -> Optional[str]:
+    """Campus al que pertenece el archivo según su nombre"""
+    if categoria == 'Mentoreo':
+        # Para mentoreo, buscar el código de campus en cualquier parte del nombre
+        for campus in CAMPUS_CODES:
+            if campus in nombre_archivo.upper():
+                return campus
+        return None
+    
+    match = re.search(CATEGORIAS_CONFIG[categoria]['nombre_archivo_patron'], nombre_archivo)
+    return match.group(1) if match else None
+
+def corresponde_a_categoria(nombre_archivo: str, categoria: str) -> bool:
+    """True si el nombre cumple nombre_archivo_patron de la categoría"""
+    return re.search(CATEGORIAS_CONFIG[categoria]['nombre_archivo_patron'], nombre_archivo) is not None
+
+def detectar_categoria(nombre_archivo: str) -> Optional[str]:
+    """Categoría a la que corresponde un archivo según nombre_archivo_patron.
+    
+    El patrón de Mentoreo acepta casi cualquier nombre, así que solo se usa
+    cuando el nombre menciona mentoreo.
+    """
+    for categoria in CATEGORIAS_CONFIG:
+        if categoria != 'Mentoreo' and corresponde_a_categoria(nombre_archivo, categoria):
+            return categoria
+    
+    if 'mentoreo' in nombre_archivo.lower() and corresponde_a_categoria(nombre_archivo, 'Mentoreo'):
+        return 'Mentoreo'
+    return None
+
+def auditar_archivo_subido(archivo, nombre_archivo: str, categoria: str, corrector: CorrectorLocal,
+                           tamano: Optional[int] = None) -> Dict[str, Any]:
+    """Lee y audita un archivo completo, eligiendo la auditoría en memoria o por bloques.
+    
+    Devuelve un diccionario independiente de la interfaz con 'nombre', 'campus',
+    'leido', 'problemas' (textos para la lista de archivos con problemas),
+    'errores', 'encoding', 'es_utf8', 'dialecto' (ver detectar_dialecto),
+    'total_registros', 'registros_validos', 'correcciones' y 'rendimiento'
+    (tiempo y memoria por etapa, ver rendimiento.medir_rendimiento).
+    """
+    with medir_rendimiento(nombre_archivo, categoria) as medicion:
+        resultado = _auditar_archivo_subido(archivo, nombre_archivo, categoria, corrector, tamano)
+    resultado['rendimiento'] = medicion.como_dict()
+    return resultado
+
+def archivo_no_interpretado(resultado: Dict[str, Any], error_parseo: str, dialecto: Dict[str, str]) -> Dict[str, Any]:
+    """Marca como no leído el resultado de un archivo cuyo CSV no se pudo interpretar"""
+    resultado['leido'] = False
+    resultado['problemas'].append(
+        f"No es un CSV válido o no está en formato compatible. {error_parseo} "
+        f"(leído con {describir_dialecto(dialecto)})"
+    )
+    return resultado
+
+def _auditar_archivo_subido(archivo, nombre_archivo: str, categoria: str, corrector: CorrectorLocal,
+                            tamano: Optional[int]) -> Dict[str, Any]:
+    resultado = {
+        'nombre': nombre_archivo,
+        'campus': detectar_campus(nombre_archivo, categoria),
+        'leido': True,
+        'problemas': [],
+    }
+    
+    if tamano is not None and tamano > LIMITE_AUDITORIA_EN_MEMORIA:
+        # Archivos muy grandes: se auditan por bloques sin cargarlos completos
+        auditoria = auditar_csv_por_bloques(
+            archivo, nombre_archivo, categoria, corrector, tamano_bloque=TAMANO_BLOQUE_FILAS
+        )
+        encoding_usado, es_utf8 = auditoria['encoding'], auditoria['es_utf8']
+        dialecto = resultado['dialecto'] = auditoria['dialecto']
         
-        for tipo, count in tipos_errores.items():
-            todos_errores.append(f"{tipo}: {count} casos")
+        if auditoria['error_parseo'] is not None:
+            return archivo_no_interpretado(resultado, auditoria['error_parseo'], dialecto)
+        total_registros = auditoria['total_registros']
+        registros_validos = auditoria['registros_validos']
+        correcciones = auditoria['correcciones']
+        errores = auditoria['errores'] + resumir_conteo(auditoria['conteo_errores'], limite=3)
     else:
-        todos_errores.extend(errores_registros)
+        # Leer el archivo decodificándolo una sola vez
+        lectura = ingerir_csv(archivo, categoria)
+        df, encoding_usado, es_utf8 = lectura['df'], lectura['encoding'], lectura['es_utf8']
+        dialecto = resultado['dialecto'] = lectura['dialecto']
+        
+        if df is None:
+            return archivo_no_interpretado(resultado, lectura['error_parseo'], dialecto)
+        del lectura
+        
+        errores, total_registros, registros_validos, correcciones, registro_errores = auditar_archivo(
+            df, nombre_archivo, categoria, encoding_usado, es_utf8, corrector
+        )
+        del df
+        # Errores estructurales primero, luego los tipos de error por fila más frecuentes
+        with etapa('combinacion'):
+            errores += resumir_errores(registro_errores, limite=3)
+    
+    if not es_utf8:
+        resultado['problemas'].append(
+            f"No está en formato UTF-8 (detectado: {encoding_usado}). Se recomienda convertir a UTF-8."
+        )
+    
+    resultado.update({
+        'errores': errores,
+        'encoding': encoding_usado,
+        'es_utf8': es_utf8,
+        'dialecto': dialecto,
+        'total_registros': total_registros,
+        'registros_validos': registros_validos,
+        'correcciones': correcciones,
+    })
+    return resultado
+
+# Un corrector por proceso de trabajo, reutilizado entre archivos
+_CORRECTORES_PROCESO: Dict[str, CorrectorLocal] = {}
+
+def corrector_proceso(ruta_cache: str = '') -> CorrectorLocal:
+    """Corrector de este proceso para la ruta del cache persistente, creado en el primer uso"""
+    corrector = _CORRECTORES_PROCESO.get(ruta_cache)
+    if corrector is None:
+        corrector = CorrectorLocal(cache_persistente=ruta_cache or None)
+        _CORRECTORES_PROCESO[ruta_cache] = corrector
+    return corrector
+
+def auditar_contenido(nombre_archivo: str, contenido: bytes, categoria: str,
+                      ruta_cache: str = '') -> Dict[str, Any]:
+    """Audita el contenido de un archivo; punto de entrada de los procesos de trabajo.
     
-    return todos_errores, total_registros, registros_validos, correcciones
+    Recibe solo datos serializables y mantiene cache de correcciones por proceso.
+    """
+    return auditar_archivo_subido(
+        io.BytesIO(contenido), nombre_archivo, categoria, corrector_proceso(ruta_cache), tamano=len(contenido)
+    )